@@ -1,9 +1,5 @@
-import pandas as pd
-from pandas.errors import *
 import streamlit as st
-from streamlit_echarts import st_echarts
 from pathlib import Path
-import pickle
 
 app_path = Path(__file__).resolve().parent 
 static_path = app_path / "static"
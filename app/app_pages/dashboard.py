@@ -5,9 +5,10 @@ import streamlit as st
 from streamlit_echarts import st_echarts
 from pathlib import Path
 import pandas as pd
-import plotly.express as px
-import geopandas as gpd
-import folium
+
+from bitmap_index import BitmapIndex, gather
+from chart_cache import chart_cache
+from choropleth import map_payload
 
 class Dashboard:
     """Dashboard app page class"""
@@ -52,32 +53,72 @@ class Dashboard:
 
         self.render_page()
 
-    @st.cache_data(show_spinner=False)
-    def read_data(_self):
+    def data_version(self):
+        """Fingerprint of cleaned_data.csv. Every data-derived cache below
+        and every chart key includes it, so a rebuilt dataset is picked up
+        on the next rerun instead of serving stale frames and charts"""
+
+        from column_store import open_store
 
-        path = _self.data_path / "cleaned_data.csv"
-        df = pd.read_csv(path)
+        return open_store(self.data_path / "cleaned_data.csv").fingerprint()
 
-        return df
+    @st.cache_resource(show_spinner=False, max_entries=4)
+    def read_data(_self, version: str, columns: tuple = None):
+        """Zero-copy view of cleaned_data.csv projected to `columns`, over
+        the memory-mapped columnar store; server processes on the host
+        share its pages through the OS page cache"""
 
+        from column_store import open_store
 
-    @st.cache_data(show_spinner=False)
-    def transform_data(_self, df, by: str):
-        """Aggregates the cleaned dataframe"""
+        return open_store(_self.data_path / "cleaned_data.csv").load(columns)
 
-        df = df.groupby(by)["financial_worry"].median().reset_index()
 
-        return df
+    @st.cache_resource(show_spinner=False, max_entries=2)
+    def corr_stats(_self, version: str):
+        """Per-economy correlation accumulators, built once per data version"""
 
+        from corr_stats import CorrelationStats
 
-    @st.cache_data(show_spinner=False)
-    def make_corr_matrix(_self, df):
+        return CorrelationStats(_self.read_data(version))
 
-        numeric_df = df.select_dtypes(include=['int64', 'float64']).copy()
-        corr = numeric_df.corr()
+    def make_corr_matrix(self, version: str, countries=None):
+        """Correlation over the selected economies (all when None),
+        merged from the accumulators instead of rescanning rows"""
 
-        return corr
+        return self.corr_stats(version).corr(countries)
     
+    @st.cache_resource(show_spinner=False, max_entries=2)
+    def bitmap_index(_self, version: str):
+        """Bitmaps over the row-level filter attributes, built once per data version"""
+
+        df = _self.read_data(version)
+        attributes = ["economy", "female", "inc_q", "emp_in", "account", "borrowed", "saved",
+                      "receive_wages", "receive_transfers", "receive_pension", "pay_utilities",
+                      "anydigpayment", "mobileowner", "internetaccess", "debit_card",
+                      "credit_card", "paid_balance_regularly"]
+        columns = {name: df[name] for name in attributes}
+        columns["ages_cut"] = _self.add_age_cuts(df)
+
+        return BitmapIndex(columns)
+
+    def stress_scores(self):
+        """Model predictions for every respondent, materialized on disk
+        once per model and data version. Not cached in the session: a
+        swapped checkpoint or a new dataset must select other scores"""
+
+        from stress_scores import open_scores
+
+        return open_scores(self.data_path / "cleaned_data.csv",
+                           self.models_path / "best_ordinal_nn_model.npz")
+
+    @st.cache_resource(show_spinner=False, max_entries=2)
+    def worry_cube(_self, version: str):
+        """Per-filter-cell financial_worry histograms, built once per data version"""
+
+        from worry_cube import WorryCube
+
+        return WorryCube(_self.read_data(version))
+
     def add_age_cuts(self, df):
 
         bins = [0, 20, 40, 60, 80, df["age"].max()]
@@ -88,43 +129,25 @@ class Dashboard:
         return series 
 
 
-    def make_map(self):
-
-        path = self.static_path / "ne_110m_admin_0_countries/ne_110m_admin_0_countries.shp"
-        world = gpd.read_file(path)
-        df = self.read_data()
-        agg_df = self.transform_data(df, "economy")
+    @st.cache_resource(show_spinner=False)
+    def map_names(_self):
+        """Country order of the committed simplified geometry"""
 
-        merged = world.merge(agg_df, how="left", left_on="NAME", right_on="economy")
+        from choropleth import country_names
 
-        map = folium.Map(location=[0, 0], zoom_start=2)
-
-        folium.Choropleth(
-            geo_data=merged,
-            name="choropleth",
-            data=merged,
-            columns=["NAME", "financial_worry"],
-            key_on="feature.properties.NAME",
-            fill_color="YlOrRd",
-            fill_opacity=0.7,
-            line_opacity=0.2,
-            legend_name="Index"
-        ).add_to(map)
-
-        map.save(self.static_path / "map.html")
+        return country_names()
 
 
     def research_dash(self):
         """Renders the research 
         data dashboard"""
 
-        df = self.read_data()
+        version = self.data_version()
+        df = self.read_data(version)
 
         answers = len(df)
         country_num = df["economy"].nunique()
 
-        corr = self.make_corr_matrix(df)
-
         c1, c2, c3 = st.columns([4, 5, 4])
 
         with c1.popover("About the Research", icon=":material/info:"):
@@ -166,13 +189,16 @@ UN Sustainable Development Goals.""")
             st.html("<span class='any_container'></span>")
             df_counts = df[[self.col_dict[selected_var]]]
             df_counts.columns = ["values"]
-            options = self.graphs.histogram(df_counts, selected_var)
+            options = self.graphs.histogram(df_counts, selected_var, key=(version, selected_var))
 
             st_echarts(options, height="460px", theme="dark")
 
         with st.container():
             st.html("<span class='any_container'></span>")
-            options = self.graphs.correlation_heatmap(corr)
+            countries = st.multiselect("Filter Countries", self.corr_stats(version).groups,
+                                       placeholder="All Countries")
+            corr = self.make_corr_matrix(version, countries or None)
+            options = self.graphs.correlation_heatmap(corr, key=(version, tuple(sorted(countries))))
             _, col1 = st.columns([0.7, 10])
             with col1:
                 st_echarts(options, height="500px", theme="dark")
@@ -184,7 +210,7 @@ UN Sustainable Development Goals.""")
             st.html("<span class='any_container'></span>")
             df_counts = df[[self.col_dict[selected_var]]]
             df_counts.columns = ["values"]
-            options = self.graphs.pie_plot(df_counts, selected_var)
+            options = self.graphs.pie_plot(df_counts, selected_var, key=(version, selected_var))
 
             st_echarts(options, height="460px", theme="dark")
 
@@ -192,12 +218,13 @@ UN Sustainable Development Goals.""")
     def info_dashboard(self):
         """Renders the real info dashboard"""
         
-        df = self.read_data()
+        version = self.data_version()
+        df = self.read_data(version)
 
         c1, c2, c3 = st.columns(3)
         countries = df["economy"].unique().tolist()
-        country_filter = c1.selectbox("Select a Country", ["All"] + countries, index=0)
-        country_filter = countries if country_filter == "All" else [country_filter]
+        country_choice = c1.selectbox("Select a Country", ["All"] + countries, index=0)
+        country_filter = countries if country_choice == "All" else [country_choice]
 
         sex_filter = c2.selectbox("Select a Gender", ["All"] + ["Male", "Female"], index=0)
         sex_translator = {
@@ -205,14 +232,19 @@ UN Sustainable Development Goals.""")
         }
         sex_filter =  [0, 1] if sex_filter == "All" else [sex_translator[sex_filter]]
 
-        ages_cuts = self.add_age_cuts(df)
-        df["ages_cut"] = ages_cuts
-        ages_filter = c3.selectbox("Select an Age Range", ["All"] + list(ages_cuts), index=0)
-        ages_filter = list(ages_cuts) if ages_filter == "All" else [ages_filter]
+        index = self.bitmap_index(version)
+        age_labels = index.values("ages_cut")
+        ages_filter = c3.selectbox("Select an Age Range", ["All"] + age_labels, index=0)
+        ages_filter = age_labels if ages_filter == "All" else [ages_filter]
 
-        df_filtered = df[df["ages_cut"].isin(ages_filter)
-                        & df["female"].isin(sex_filter) 
-                        & df["economy"].isin(country_filter)]
+        rows = index.select(ages_cut=ages_filter, female=sex_filter,
+                            economy=None if country_choice == "All" else country_filter)
+
+        # small, hashable description of the active filters for the chart cache
+        filter_key = (version, country_choice, tuple(sex_filter), tuple(ages_filter))
+
+        cube = self.worry_cube(version)
+        age_mask = self.add_age_cuts(pd.DataFrame({"age": cube.ages})).isin(ages_filter).to_numpy()
 
 
         c1, c2 = st.columns([4, 6])
@@ -225,10 +257,13 @@ UN Sustainable Development Goals.""")
                 <h5>Financial Worry Map</h5>
                 """, unsafe_allow_html=True)
 
-            with open(self.static_path / "map.html", "r", encoding="utf-8") as file:
-                html_content = file.read()
-            
-            st.components.v1.html(html_content, height=540)
+            # geometry is served from static/ and cached by the browser,
+            # only the per-country medians change with the filters
+            values = cube.median_by_country(None if country_choice == "All" else country_filter,
+                                            {"female": sex_filter}, age_mask)
+            payload = map_payload(values, self.map_names())
+
+            st.components.v1.iframe(f"app/static/choropleth.html#{payload}", height=540)
 
         
         with c2:
@@ -236,8 +271,9 @@ UN Sustainable Development Goals.""")
             vars = list(visuable_cols.keys())
             selected_var = st.selectbox("Select a Variable", vars, index=(len(vars) - 1))
             st.html("<span class='any_container'></span>")
-            df_agg = df_filtered[[self.col_dict[selected_var], "financial_worry"]].dropna()
-            options = self.graphs.boxplot(df_agg, self.col_dict[selected_var], selected_var)
+            df_agg = gather(df, rows, [self.col_dict[selected_var], "financial_worry"]).dropna()
+            options = self.graphs.boxplot(df_agg, self.col_dict[selected_var], selected_var,
+                                          key=(selected_var, *filter_key))
 
             st_echarts(options, height="500px", theme="dark")
 
@@ -256,19 +292,40 @@ UN Sustainable Development Goals.""")
                 phone_check = column2.checkbox("Mobile Phone Owner", value=True)
 
 
-            df_filtered_v2 = df_filtered[(df_filtered["female"] == int(sex_check))
-                & (df_filtered["emp_in"] == int(employed_check))
-                & (df_filtered["saved"] == int(saved_money_check))
-                & (df_filtered["account"] == int(account_check))
-                & (df_filtered["credit_card"] == int(cred_card_check))
-                & (df_filtered["mobileowner"] == int(phone_check))]
-            
-            df_filtered_v2 = self.transform_data(df_filtered_v2, "age").sort_values("age")
+            flags = {
+                "female": [sex for sex in sex_filter if sex == int(sex_check)],
+                "emp_in": [int(employed_check)],
+                "saved": [int(saved_money_check)],
+                "account": [int(account_check)],
+                "credit_card": [int(cred_card_check)],
+                "mobileowner": [int(phone_check)],
+            }
+
+            df_filtered_v2 = cube.median_by_age(None if country_choice == "All" else country_filter,
+                                                flags, age_mask)
 
-            options = self.graphs.echart_dict(df_filtered_v2)
+            options = self.graphs.echart_dict(
+                df_filtered_v2, key=(*filter_key, *((flag, tuple(v)) for flag, v in flags.items())))
 
             st_echarts(options, height="500px")
 
+        with st.container():
+            st.html("<span class='any_container'></span>")
+
+            st.markdown("""
+                <h5>Predicted Financial Stress by Country</h5>
+                """, unsafe_allow_html=True)
+
+            # precomputed predictions: the filters only select rows, nothing is scored here
+            scores = self.stress_scores()
+            economy = df["economy"].cat
+            counts = scores.class_counts(economy.codes.to_numpy(), len(economy.categories), rows)
+            labels = ["Low Stress", "Medium Stress", "High Stress"]
+
+            options = self.graphs.predicted_stress_bar(economy.categories.tolist(), counts, labels,
+                                                       key=(scores.key, *filter_key))
+
+            st_echarts(options, height="600px", theme="dark")
 
 
     def render_page(self):
@@ -281,6 +338,10 @@ UN Sustainable Development Goals.""")
         elif options == "Research and Sample Dashboard":
             self.research_dash()
 
+        stats = chart_cache.stats()
+        st.caption(f"Chart cache: {stats['hits']:,} hits · {stats['misses']:,} misses · "
+                   f"{stats['entries']:,} charts ({stats['bytes'] / 1e6:.1f} MB) shared by every session")
+
 if __name__ == "__main__":
 
     dash = Dashboard()
@@ -1,9 +1,6 @@
-import pandas as pd
-from pandas.errors import *
 import streamlit as st
 from streamlit_echarts import st_echarts
 from pathlib import Path
-import pickle
 
 
 class About:
@@ -104,6 +101,8 @@ class About:
 
     def about_model(self):
 
+        import pandas as pd
+
         params_data = pd.read_csv(self.data_path / "logistic_regression_bayes_coef.csv")
 
         with st.container():
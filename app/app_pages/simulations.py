@@ -8,10 +8,13 @@ from streamlit_echarts import st_echarts
 from pathlib import Path
 import numpy as np
 
-import torch
-import torch.nn as nn
-
-from ordinal_model import PowerfulOrdinalNN
+from feature_schema import FeatureSchema
+from graphs import Graphs
+from folded_model import load_folded_model
+from logistic_model import load_logistic_model
+from model_registry import registry
+from prediction_cache import prediction_cache
+from whatif import sensitivity_sweep
 
 
 class Simulator:
@@ -25,46 +28,38 @@ class Simulator:
         self.models_path = self.app_path.parent / "models"
         self.data_path = self.app_path.parent / "data"
 
-        def load_ordinal_model(path: Path):
-            model = PowerfulOrdinalNN(in_features=154, hidden1=128, hidden2=64, out_features=2)  
-            ckpt = torch.load(path, map_location="cpu")
-            model.load_state_dict(ckpt)
-            model.eval()
-            return model
+        # display name -> (artifact, loader); all served through the registry
+        self.models = {
+            "Ordinal Neural Network": (self.models_path / "best_ordinal_nn_model.npz", load_folded_model),
+            "Logistic Regression": (self.models_path / "basic_logistic_regression.json", load_logistic_model),
+        }
+        self.schema = FeatureSchema.load(self.models_path / "feature_schema.json")
+        self.graphs = Graphs()
+
+    @property
+    def ordinal_model(self):
+        """Loaded by the registry on the first prediction, not on the first render"""
 
-        self.ordinal_model = load_ordinal_model(self.models_path / "best_ordinal_nn_model.pth")
+        return registry.get(*self.models["Ordinal Neural Network"])
 
     def __call__(self):
 
         self.data_input()
 
 
-    @st.cache_data(show_spinner=False)
-    def read_data(_self, path):
-        
-        data = pd.read_csv(path, encoding="latin1")
-
-        return data
-
-
     # kind of a back end
-    def predict_class(self, df: pd.DataFrame):
-        if df.empty:
+    def predict_class(self, X, model_name: str = None):
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        if X.size == 0:
             raise EmptyDataError("O DataFrame está vazio")
-        x = torch.tensor(df.values, dtype=torch.float32)
-        with torch.no_grad():
-            logits = self.ordinal_model(x)
-            probs  = torch.softmax(logits, dim=1).numpy()
-            preds  = probs.argmax(axis=1)
+        # repeat submissions are answered from the shared cache without a forward pass
+        preds, probs = prediction_cache.predict(X, *self.models[model_name or "Ordinal Neural Network"])
         return preds, probs
 
 
 
     def data_input(self):
 
-        data = self.read_data(self.data_path / "micro_world_139countries.csv")
-        dummies_data  = pd.get_dummies(data, columns=['economy'], drop_first=True)
-
         col1, col2, col3 = st.columns([.05, 10, .05])
 
         col2.subheader("Model Data Input")
@@ -75,8 +70,7 @@ class Simulator:
 
             c1, c2 = st.columns(2)
 
-            countries_list = data["economy"].unique().tolist()
-            countries_list.remove("China")
+            countries_list = self.schema.country_names
 
             with c1:
                 country = st.selectbox("Select your country", countries_list, index=countries_list.index("Brazil"))
@@ -95,6 +89,7 @@ class Simulator:
 
             with c2:
                 inc_quant = st.selectbox("Select Your Income Quantile", [1, 2, 3, 4, 5], index=2)
+                model_name = st.selectbox("Select the model", list(self.models), index=0)
                 age = st.slider("Select your age", 0, 100, 30)
                 st.markdown(
                     """
@@ -112,61 +107,29 @@ class Simulator:
 
             if submitted:
 
-                df = pd.DataFrame(
-                    {
-                        "female": [1 if sexo == "Female" else 0],
-                        "age": [age],
-                        "inc_q": [inc_quant],
-                        "emp_in": [float(emp_in)],
-                        "account": [float(fin_account)],
-                        "borrowed": [float(borrowed)],
-                        "saved": [float(saved)],
-                        "receive_wages": [float(receive_wages)],
-                        "receive_transfers": [float(receive_transfers)],
-                        "receive_pension": [float(pension)],
-                        "pay_utilities": [float(pay_utils)],
-                        "anydigpayment": [float(digital_payment)],
-                        "mobileowner": [float(mobile_owner)],
-                        "internetaccess": [float(internet_access)],
-                        "debit_card": [float(debit_cards)],
-                        "credit_card": [float(credit_cards)],
-                        "paid_balance_regularly": [float(payed_balance)]
-                    }
-                )
-
-                country_cols = [col for col in dummies_data.columns if "economy" in col.lower()]
-                country_cols.remove("economycode")
-                country_cols.remove("economy_China")
-
-                col1, col2 = st.columns([5, 8])
-
-                df_temp = (
-                    pd.DataFrame({
-                        "country_col": country_cols,
-                        "country": countries_list[1:]
-                        })
-                        .assign(
-                            chosen_country = lambda x: x["country"].apply(
-                                lambda y: 1 if y == country else 0
-                                )
-                                )
-                                .drop(columns="country")
-                                ).T
-                
-                df_temp.columns = df_temp.iloc[0, :]
-                df_temp = df_temp[1:]
-                df_temp.index = [0]
-                df_temp = df_temp.rename(columns={"economy_Côte d'Ivoire": "economy_CÃ´te d'Ivoire",
-                                        "economy_Türkiye": "economy_TÃ¼rkiye"})
-                
-                df_temp = df_temp.astype({col: int for col in df_temp.columns})
-
-                df = pd.concat([df, df_temp], axis=1)
-
-                for col in df_temp.columns:
-                    print(df[col].dtype)
-
-                class_, proba = self.predict_class(df)
+                values = {
+                    "female": 1 if sexo == "Female" else 0,
+                    "age": age,
+                    "inc_q": inc_quant,
+                    "emp_in": float(emp_in),
+                    "account": float(fin_account),
+                    "borrowed": float(borrowed),
+                    "saved": float(saved),
+                    "receive_wages": float(receive_wages),
+                    "receive_transfers": float(receive_transfers),
+                    "receive_pension": float(pension),
+                    "pay_utilities": float(pay_utils),
+                    "anydigpayment": float(digital_payment),
+                    "mobileowner": float(mobile_owner),
+                    "internetaccess": float(internet_access),
+                    "debit_card": float(debit_cards),
+                    "credit_card": float(credit_cards),
+                    "paid_balance_regularly": float(payed_balance)
+                }
+
+                x = self.schema.encode_row(values, country)
+
+                class_, proba = self.predict_class(x, model_name)
 
                 dict_class = {
                     0: "Low Stress",
@@ -185,6 +148,28 @@ class Simulator:
                     c1.metric("Predicted Financial Stress Level", class_)
                     c2.metric("Predicted Probabilities", f"{round(proba, 5) * 100}%")
 
+                self.what_if(x, model_name, age, inc_quant)
+
+
+    def what_if(self, x, model_name, age, inc_quant):
+        """Sensitivity of the prediction, every variant scored in one batch"""
+
+        sweep = sensitivity_sweep(registry.get(*self.models[model_name]), x)
+
+        col1, col2, col3 = st.columns([.05, 10, .05])
+        col2.subheader("What-if Analysis")
+        col2.caption(f"Current stress probability {sweep['base'] * 100:.2f}% · "
+                     f"{sweep['variants']} variants scored in one pass ({sweep['seconds'] * 1e3:.2f} ms)")
+
+        st_echarts(self.graphs.sensitivity_bar(sweep), height="500px", theme="dark")
+
+        c1, c2 = st.columns(2)
+        with c1:
+            st_echarts(self.graphs.sensitivity_line(sweep["age"], "Along Age", "Age", age),
+                       height="400px", theme="dark")
+        with c2:
+            st_echarts(self.graphs.sensitivity_line(sweep["inc_q"], "Along Income Quantile", "Income quantile",
+                                                    inc_quant), height="400px", theme="dark")
 
 
 if __name__ == "__main__":
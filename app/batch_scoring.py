@@ -0,0 +1,241 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import argparse
+import io
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from etl import RAW_FILLNA, RAW_RECODES, RAW_RENAMES
+from feature_schema import FeatureSchema, NUMERIC_FEATURES
+from folded_model import load_folded_model
+from logistic_model import load_logistic_model
+from model_registry import registry
+
+app_path = Path(__file__).resolve().parent
+models_path = app_path.parent / "models"
+data_path = app_path.parent / "data"
+
+# model type -> (default artifact, registry loader); neither needs torch
+MODEL_TYPES = {
+    "ordinal": (models_path / "best_ordinal_nn_model.npz", load_folded_model),
+    "logistic": (models_path / "basic_logistic_regression.json", load_logistic_model),
+}
+
+
+class _ByteRange(io.RawIOBase):
+    """Read-only view over [start, end) of a file"""
+
+    def __init__(self, path, start: int, end: int):
+
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self._left = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+
+        if self._left <= 0:
+            return 0
+        view = memoryview(buffer)[:self._left]
+        n = self._file.readinto(view)
+        self._left -= n
+        return n
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class BatchScorer:
+    """Scores whole survey files with the ordinal network or the logistic regression"""
+
+    def __init__(self, model_path: Path = None, chunksize: int = 20_000,
+                 encoding: str = "latin1", keep_columns=("economy",), schema_path: Path = None,
+                 model_type: str = "ordinal"):
+
+        default_path, self.loader = MODEL_TYPES[model_type]
+        self.model_type = model_type
+        self.model_path = Path(model_path or default_path)
+        self.schema_path = Path(schema_path or models_path / "feature_schema.json")
+        self.schema = FeatureSchema.load(self.schema_path)
+        self.chunksize = chunksize
+        self.encoding = encoding
+        self.keep_columns = list(keep_columns)
+
+    @property
+    def model(self):
+
+        return registry.get(self.model_path, self.loader)
+
+    @property
+    def n_classes(self):
+        """Probability columns: one per worry level for either model"""
+
+        return self.model.n_classes
+
+    def read_header(self, path: Path):
+
+        return pd.read_csv(path, nrows=0, encoding=self.encoding).columns.tolist()
+
+    def source_columns(self, header):
+        """Columns needed from the input, raw or cleaned layout"""
+
+        is_raw = "fin4" in header
+        inverse = {value: key for key, value in RAW_RENAMES.items()}
+        features = [inverse.get(col, col) if is_raw else col for col in NUMERIC_FEATURES]
+        keep = [col for col in self.keep_columns if col in header]
+
+        return is_raw, list(dict.fromkeys(["economy"] + features + keep))
+
+    def output_columns(self, header):
+
+        keep = [col for col in self.keep_columns if col in header]
+
+        return keep + ["predicted_class"] + [f"proba_{i}" for i in range(self.n_classes)]
+
+    def encode(self, chunk: pd.DataFrame, is_raw: bool):
+        """Vectorized encoding of a chunk into the 154 model features"""
+
+        if is_raw:
+            for col, mapping in RAW_RECODES.items():
+                chunk[col] = chunk[col].replace(mapping)
+            chunk = chunk.rename(columns=RAW_RENAMES).fillna(RAW_FILLNA)
+
+        return self.schema.encode_frame(chunk)
+
+    def predict(self, X: np.ndarray):
+
+        return self.model.predict(X)
+
+    def score_chunk(self, chunk: pd.DataFrame, is_raw: bool):
+
+        X, valid = self.encode(chunk, is_raw)
+
+        keep = [col for col in self.keep_columns if col in chunk.columns]
+        out = chunk[keep].reset_index(drop=True)
+        classes = pd.array(np.full(len(chunk), pd.NA), dtype="Int8")
+        probs = np.full((len(chunk), self.n_classes), np.nan, dtype=np.float32)
+
+        if valid.any():
+            preds, valid_probs = self.predict(X[valid])
+            classes[valid] = preds
+            probs[valid] = valid_probs
+
+        out["predicted_class"] = classes
+        for i in range(probs.shape[1]):
+            out[f"proba_{i}"] = probs[:, i]
+
+        return out
+
+    def score_range(self, path: Path, output: Path, start: int, end: int,
+                    header, write_header: bool = False):
+        """Scores the lines in [start, end) of path into output"""
+
+        is_raw, usecols = self.source_columns(header)
+        rows = 0
+
+        reader = pd.read_csv(io.BufferedReader(_ByteRange(path, start, end)),
+                             header=None, names=header, usecols=usecols,
+                             encoding=self.encoding, chunksize=self.chunksize)
+
+        with reader, open(output, "w", encoding="utf-8", newline="") as file:
+            for chunk in reader:
+                out = self.score_chunk(chunk, is_raw)
+                out.to_csv(file, header=write_header and rows == 0, index=False)
+                rows += len(out)
+
+        return rows
+
+    def split_ranges(self, path: Path, n_parts: int):
+        """Newline-aligned byte ranges after the header line"""
+
+        size = path.stat().st_size
+
+        with open(path, "rb") as file:
+            file.readline()
+            bounds = [file.tell()]
+            for i in range(1, n_parts):
+                file.seek(max(bounds[0] + (size - bounds[0]) * i // n_parts, bounds[-1]))
+                file.readline()
+                bounds.append(max(file.tell(), bounds[-1]))
+        bounds.append(size)
+
+        return [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+    def score_file(self, path: Path, output: Path, workers: int = 1):
+        """Scores path into output, splitting the file across workers"""
+
+        path, output = Path(path), Path(output)
+        started = time.perf_counter()
+
+        header = self.read_header(path)
+        ranges = self.split_ranges(path, max(workers, 1))
+
+        if not ranges:
+            output.write_text(",".join(self.output_columns(header)) + "\n", encoding="utf-8")
+            rows = 0
+        elif workers <= 1:
+            rows = self.score_range(path, output, ranges[0][0], ranges[-1][1],
+                                    header, write_header=True)
+        else:
+            parts = [output.with_name(f"{output.name}.part{i}") for i in range(len(ranges))]
+            jobs = [(self.model_path, self.chunksize, self.encoding, self.keep_columns,
+                     self.schema_path, self.model_type, path, part, start, end, header)
+                    for part, (start, end) in zip(parts, ranges)]
+
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                rows = sum(pool.map(_score_part, jobs))
+
+            with open(output, "w", encoding="utf-8", newline="") as file:
+                file.write(",".join(self.output_columns(header)) + "\n")
+                for part in parts:
+                    with open(part, "r", encoding="utf-8", newline="") as src:
+                        shutil.copyfileobj(src, file)
+                    part.unlink()
+
+        seconds = time.perf_counter() - started
+
+        return {
+            "rows": rows,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(rows / seconds, 1) if seconds else None,
+            "workers": workers,
+        }
+
+
+def _score_part(job):
+    """Process pool entry point"""
+
+    (model_path, chunksize, encoding, keep_columns, schema_path, model_type,
+     path, part, start, end, header) = job
+
+    scorer = BatchScorer(model_path, chunksize, encoding, keep_columns, schema_path, model_type)
+
+    return scorer.score_range(path, part, start, end, header)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Offline batch scoring with PowerfulOrdinalNN or the logistic regression")
+    parser.add_argument("input", type=Path, nargs="?", default=data_path / "micro_world_139countries.csv")
+    parser.add_argument("-o", "--output", type=Path, default=data_path / "scored.csv")
+    parser.add_argument("-w", "--workers", type=int, default=1)
+    parser.add_argument("--chunksize", type=int, default=20_000)
+    parser.add_argument("--encoding", default="latin1")
+    parser.add_argument("--model-type", choices=list(MODEL_TYPES), default="ordinal")
+    parser.add_argument("--model", type=Path, default=None, help="defaults to the model type's artifact")
+    args = parser.parse_args()
+
+    scorer = BatchScorer(args.model, args.chunksize, args.encoding, model_type=args.model_type)
+    stats = scorer.score_file(args.input, args.output, args.workers)
+
+    print(f"Scored {stats['rows']:,} rows in {stats['seconds']}s "
+          f"({stats['rows_per_second']:,} rows/s, {stats['workers']} workers)")
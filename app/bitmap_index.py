@@ -0,0 +1,68 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import numpy as np
+import pandas as pd
+
+
+class BitmapIndex:
+    """Packed bitmaps per attribute value; filters combine with
+    bitwise OR inside an attribute and AND across attributes"""
+
+    def __init__(self, columns: dict):
+
+        self.n_rows = None
+        self.bitmaps = {}
+
+        for name, values in columns.items():
+            categorical = pd.Categorical(values)
+            codes = categorical.codes
+            self.n_rows = len(codes) if self.n_rows is None else self.n_rows
+            if len(codes) != self.n_rows:
+                raise ValueError(f"{name} has {len(codes)} rows, expected {self.n_rows}")
+
+            self.bitmaps[name] = {
+                value: np.packbits(codes == i)
+                for i, value in enumerate(categorical.categories)
+            }
+
+        self._all = np.packbits(np.ones(self.n_rows or 0, dtype=bool))
+        self._none = np.zeros_like(self._all)
+
+    def values(self, name: str):
+
+        return list(self.bitmaps[name])
+
+    def bitmap(self, **filters):
+        """Packed selection for {attribute: allowed values}"""
+
+        selection = self._all.copy()
+
+        for name, allowed in filters.items():
+            if allowed is None:
+                continue
+            bitmaps = self.bitmaps[name]
+            union = self._none.copy()
+            for value in allowed:
+                if value in bitmaps:
+                    np.bitwise_or(union, bitmaps[value], out=union)
+            np.bitwise_and(selection, union, out=selection)
+
+        return selection
+
+    def select(self, **filters):
+        """Row ids matching every filter, in row order"""
+
+        bits = np.unpackbits(self.bitmap(**filters), count=self.n_rows)
+
+        return np.flatnonzero(bits)
+
+    def count(self, **filters):
+
+        return int(np.unpackbits(self.bitmap(**filters), count=self.n_rows).sum())
+
+
+def gather(df: pd.DataFrame, rows: np.ndarray, columns):
+    """Small frame with only `columns`, taken at `rows`"""
+
+    return pd.DataFrame({col: df[col].to_numpy()[rows] for col in columns})
@@ -0,0 +1,116 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import functools
+import json
+import threading
+from collections import OrderedDict
+
+
+def _to_json(value):
+    """json.dumps fallback for NumPy scalars and arrays"""
+
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class ChartCache:
+    """LRU of ECharts options, bounded by their total JSON size.
+
+    Keys are small tuples (chart type, data version, variable, active
+    filters) built by the caller, so a lookup never hashes the underlying
+    DataFrame. Options are serialized once on a miss, to size them and to
+    turn NumPy values into plain JSON types, and a hit hands back the
+    stored dict as-is: callers must treat it as read-only"""
+
+    def __init__(self, max_bytes: int = 32 << 20):
+
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Cached options for key, or None"""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, options: dict, size: int):
+
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (options, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def get_or_build(self, key, build):
+        """Options for key, calling build() -> dict on a miss"""
+
+        options = self.get(key)
+        if options is None:
+            payload = json.dumps(build(), default=_to_json, separators=(",", ":"))
+            options = json.loads(payload)
+            self.put(key, options, len(payload))
+
+        return options
+
+    def clear(self):
+
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+# shared by every Streamlit session in this process
+chart_cache = ChartCache()
+
+
+def cached_chart(kind: str):
+    """Caches a Graphs builder under (kind, *key) when called with key=...;
+    without a key the builder runs as before"""
+
+    def decorator(builder):
+
+        @functools.wraps(builder)
+        def wrapper(self, *args, key: tuple = None, **kwargs):
+
+            if key is None:
+                return builder(self, *args, **kwargs)
+
+            return chart_cache.get_or_build((kind, *key), lambda: builder(self, *args, **kwargs))
+
+        return wrapper
+
+    return decorator
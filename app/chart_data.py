@@ -0,0 +1,79 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import numpy as np
+import pandas as pd
+
+
+def boxplot_summary(df: pd.DataFrame, var: str, value_col: str = "financial_worry",
+                    bound_iqr: float = 1.5, max_outliers: int = 50, decimals: int = 3):
+    """Per-group box statistics with the conventions of ECharts'
+    `transform: boxplot` (linear quartiles, whiskers at Q -/+ bound * IQR
+    clipped to the data range), so only summaries reach the browser.
+
+    Returns (names, boxes, outliers): boxes are [low, Q1, median, Q3, high]
+    per group, outliers are [group position, value] pairs, deduplicated and
+    capped at max_outliers per group (evenly spread over the sorted values)"""
+
+    df = df[[var, value_col]].dropna()
+    groups = pd.Categorical(df[var])
+    present = np.flatnonzero(np.bincount(groups.codes, minlength=len(groups.categories)))
+    names = groups.categories[present].tolist()
+    codes = np.searchsorted(present, groups.codes)
+    values = df[value_col].to_numpy(dtype=np.float64)
+
+    order = np.lexsort((values, codes))
+    values, codes = values[order], codes[order]
+    starts = np.searchsorted(codes, np.arange(len(names) + 1))
+    sizes = np.diff(starts)
+
+    def quantile(p):
+
+        position = (sizes - 1) * p
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, sizes - 1)
+        below, above = values[starts[:-1] + lower], values[starts[:-1] + upper]
+
+        return below + (position - lower) * (above - below)
+
+    q1, median, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    iqr = q3 - q1
+    low = np.maximum(values[starts[:-1]], q1 - bound_iqr * iqr)
+    high = np.minimum(values[starts[1:] - 1], q3 + bound_iqr * iqr)
+
+    boxes = np.round(np.column_stack([low, q1, median, q3, high]), decimals).tolist()
+
+    # outliers: outside the whiskers, one point per distinct value
+    is_outlier = (values < low[codes]) | (values > high[codes])
+    is_new = np.ones(len(values), dtype=bool)
+    is_new[1:] = (values[1:] != values[:-1]) | (codes[1:] != codes[:-1])
+    keep = np.flatnonzero(is_outlier & is_new)
+
+    outliers = []
+    for group, (start, stop) in enumerate(zip(*np.searchsorted(codes[keep], [np.arange(len(names)),
+                                                                              np.arange(1, len(names) + 1)]))):
+        group_rows = keep[start:stop]
+        if len(group_rows) > max_outliers:
+            group_rows = group_rows[np.linspace(0, len(group_rows) - 1, max_outliers).round().astype(np.int64)]
+        outliers.extend([group, round(float(values[row]), decimals)] for row in group_rows)
+
+    return names, boxes, outliers
+
+
+def heatmap_cells(corr: pd.DataFrame, decimals: int = 2):
+    """[x, y, value] for the strict lower triangle, row by row,
+    with missing correlations as None"""
+
+    rows, cols = np.tril_indices(len(corr.columns), k=-1)
+    values = np.round(corr.to_numpy(dtype=np.float64)[rows, cols], decimals)
+    values = np.where(np.isnan(values), None, values).tolist()
+
+    return [list(cell) for cell in zip(cols.tolist(), rows.tolist(), values)]
+
+
+def density_bins(x: np.ndarray, y: np.ndarray):
+    """[x, y, count] for every distinct (x, y) pair"""
+
+    pairs, counts = np.unique(np.column_stack([x, y]), axis=0, return_counts=True)
+
+    return np.column_stack([pairs, counts]).tolist()
@@ -0,0 +1,81 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import argparse
+import json
+import math
+from pathlib import Path
+from urllib.parse import quote
+
+app_path = Path(__file__).resolve().parent
+static_path = app_path / "static"
+
+SHAPEFILE = static_path / "ne_110m_admin_0_countries/ne_110m_admin_0_countries.shp"
+GEOMETRY = static_path / "world_simplified.json"
+
+
+def _quantize(coords, decimals: int):
+    """Rounds a ring / polygon / multipolygon and drops repeated points"""
+
+    if isinstance(coords[0], (int, float)):
+        return [round(float(coords[0]), decimals), round(float(coords[1]), decimals)]
+
+    rounded = [_quantize(item, decimals) for item in coords]
+    if isinstance(rounded[0][0], float):
+        rounded = [point for i, point in enumerate(rounded) if i == 0 or point != rounded[i - 1]]
+
+    return rounded
+
+
+def build_geometry(shapefile: Path = SHAPEFILE, output: Path = GEOMETRY,
+                   tolerance: float = 0.1, decimals: int = 2):
+    """Simplified, quantized country GeoJSON, written to static/ and
+    committed: only regenerating it needs geopandas"""
+
+    import geopandas as gpd
+
+    world = gpd.read_file(shapefile)[["NAME", "geometry"]]
+    world["geometry"] = world.geometry.simplify(tolerance, preserve_topology=True)
+
+    features = []
+    for feature in json.loads(world.to_json())["features"]:
+        geometry = feature["geometry"]
+        geometry["coordinates"] = _quantize(geometry["coordinates"], decimals)
+        features.append({"type": "Feature", "properties": {"name": feature["properties"]["NAME"]},
+                         "geometry": geometry})
+
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump({"type": "FeatureCollection", "features": features}, file,
+                  ensure_ascii=False, separators=(",", ":"))
+
+    return output
+
+
+def country_names(path: Path = GEOMETRY):
+    """Feature order of the committed geometry file"""
+
+    with open(path, "r", encoding="utf-8") as file:
+        return [feature["properties"]["name"] for feature in json.load(file)["features"]]
+
+
+def map_payload(values: dict, names, decimals: int = 3):
+    """Per-feature values aligned with the geometry order, as a URL fragment"""
+
+    array = [None if values.get(name) is None or math.isnan(values[name]) else round(values[name], decimals)
+             for name in names]
+
+    return quote(json.dumps(array, separators=(",", ":")), safe="")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Regenerates the simplified country geometry from the shapefile")
+    parser.add_argument("shapefile", type=Path, nargs="?", default=SHAPEFILE)
+    parser.add_argument("-o", "--output", type=Path, default=GEOMETRY)
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    parser.add_argument("--decimals", type=int, default=2)
+    args = parser.parse_args()
+
+    output = build_geometry(args.shapefile, args.output, args.tolerance, args.decimals)
+
+    print(f"Saved {len(country_names(output))} countries ({output.stat().st_size / 1024:.1f} KiB) to {output}")
@@ -0,0 +1,226 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from file_lock import FileLock
+
+app_path = Path(__file__).resolve().parent
+data_path = app_path.parent / "data"
+
+
+def compact_dtype(lo, hi, integral: bool, has_nan: bool):
+    """Smallest dtype holding [lo, hi]; 0/1 flags become int8"""
+
+    if has_nan or not integral:
+        return "float64"
+
+    for dtype in ("int8", "int16", "int32"):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return dtype
+
+    return "int64"
+
+
+class ColumnStore:
+    """Memory-mapped NumPy column files built once from a CSV"""
+
+    def __init__(self, path: Path):
+
+        self.path = Path(path)
+        self.manifest_path = self.path / "manifest.json"
+        self.lock_path = self.path.with_name(f"{self.path.name}.lock")
+        self._manifest = None
+
+    @property
+    def manifest(self):
+
+        if self._manifest is None:
+            with open(self.manifest_path, "r", encoding="utf-8") as file:
+                self._manifest = json.load(file)
+        return self._manifest
+
+    @property
+    def columns(self):
+
+        return list(self.manifest["columns"])
+
+    def exists(self):
+
+        return self.manifest_path.exists()
+
+    def is_fresh(self, source: Path):
+        """True when the store was built from the current version of source"""
+
+        if not self.exists():
+            return False
+
+        stat = Path(source).stat()
+        built_from = self.manifest["source"]
+
+        return (built_from["size"], built_from["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns)
+
+    def fingerprint(self):
+        """Short hash of the source file the store was built from"""
+
+        source = json.dumps(self.manifest["source"], sort_keys=True).encode()
+
+        return hashlib.sha1(source).hexdigest()[:12]
+
+    def build(self, source: Path, chunksize: int = 100_000, **read_kwargs):
+        """Two chunked passes: infer compact dtypes, then fill the column files.
+        Built in a private directory and published by an atomic symlink
+        swap under the lock, so readers never map a half-written store"""
+
+        with FileLock(self.lock_path):
+            return self._build(source, chunksize, **read_kwargs)
+
+    def _build(self, source: Path, chunksize: int = 100_000, **read_kwargs):
+        """build() with the lock already held"""
+
+        source = Path(source)
+
+        # builds left behind by a process that died mid-way
+        current = self.path.resolve() if self.path.is_symlink() else None
+        for leftover in self.path.parent.glob(f".{self.path.name}.*"):
+            if leftover != current:
+                shutil.rmtree(leftover, ignore_errors=True)
+
+        building = self.path.with_name(f".{self.path.name}.{os.getpid()}.{time.time_ns()}")
+        stats, rows = {}, 0
+
+        for chunk in pd.read_csv(source, chunksize=chunksize, **read_kwargs):
+            rows += len(chunk)
+            for col in chunk.columns:
+                series = chunk[col]
+                current = stats.setdefault(col, {"lo": np.inf, "hi": -np.inf, "integral": True,
+                                                 "has_nan": False, "categories": None})
+                if not pd.api.types.is_numeric_dtype(series):
+                    current["categories"] = (current["categories"] or set()) | set(series.dropna().unique())
+                    continue
+                values = series.to_numpy(dtype=np.float64)
+                finite = values[~np.isnan(values)]
+                current["has_nan"] |= len(finite) < len(values)
+                if len(finite):
+                    current["lo"] = min(current["lo"], finite.min())
+                    current["hi"] = max(current["hi"], finite.max())
+                    current["integral"] &= bool((finite == np.round(finite)).all())
+
+        building.mkdir(parents=True)
+        columns, files = {}, {}
+
+        for col, current in stats.items():
+            if current["categories"] is not None:
+                categories = sorted(current["categories"])
+                columns[col] = {"dtype": "int16", "categories": categories}
+            else:
+                columns[col] = {"dtype": compact_dtype(current["lo"], current["hi"],
+                                                      current["integral"], current["has_nan"])}
+            files[col] = np.lib.format.open_memmap(building / f"{col}.npy", mode="w+",
+                                                   dtype=columns[col]["dtype"], shape=(rows,))
+
+        start = 0
+        for chunk in pd.read_csv(source, chunksize=chunksize, **read_kwargs):
+            stop = start + len(chunk)
+            for col, spec in columns.items():
+                if "categories" in spec:
+                    files[col][start:stop] = pd.Categorical(chunk[col], categories=spec["categories"]).codes
+                else:
+                    files[col][start:stop] = chunk[col].to_numpy(dtype=spec["dtype"])
+            start = stop
+
+        for array in files.values():
+            array.flush()
+
+        stat = source.stat()
+        manifest = {
+            "rows": rows,
+            "columns": columns,
+            "source": {"path": source.name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns},
+        }
+        with open(building / "manifest.json", "w", encoding="utf-8") as file:
+            json.dump(manifest, file, ensure_ascii=False, indent=1)
+        del files
+
+        self._publish(building)
+        self._manifest = manifest
+
+        return self
+
+    def _publish(self, building: Path):
+        """Points self.path at the new build by replacing a symlink, which is
+        atomic; the previous build is removed, and maps open on its files
+        stay valid"""
+
+        previous = self.path.resolve() if self.path.is_symlink() else None
+        if self.path.exists() and previous is None:
+            # a store directory from before versioned builds
+            previous = self.path.with_name(f".{self.path.name}.{os.getpid()}.old")
+            self.path.rename(previous)
+
+        link = self.path.with_name(f".{self.path.name}.{os.getpid()}.link")
+        link.unlink(missing_ok=True)
+        os.symlink(building.name, link)
+        os.replace(link, self.path)
+
+        if previous is not None:
+            shutil.rmtree(previous, ignore_errors=True)
+
+    def column(self, name: str):
+        """One column as a read-only memory map (categoricals decoded)"""
+
+        spec = self.manifest["columns"][name]
+        array = np.load(self.path / f"{name}.npy", mmap_mode="r")
+
+        if "categories" in spec:
+            return pd.Categorical.from_codes(array, categories=spec["categories"])
+
+        return array
+
+    def load(self, columns=None):
+        """DataFrame over the requested columns only, backed by the memory maps"""
+
+        columns = list(columns or self.columns)
+
+        return pd.DataFrame({name: self.column(name) for name in columns}, copy=False)
+
+
+def open_store(source: Path, store_path: Path = None, **read_kwargs):
+    """Store for source, (re)built when missing or older than the CSV"""
+
+    source = Path(source)
+    store = ColumnStore(store_path or source.with_name(f"{source.stem}_store"))
+
+    if not store.is_fresh(source):
+        with FileLock(store.lock_path):
+            # another process may have built it while this one waited
+            store._manifest = None
+            if not store.is_fresh(source):
+                store._build(source, **read_kwargs)
+
+    return store
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Builds the columnar store for a cleaned CSV")
+    parser.add_argument("source", type=Path, nargs="?", default=data_path / "cleaned_data.csv")
+    parser.add_argument("-o", "--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    source = args.source
+    store = ColumnStore(args.output or source.with_name(f"{source.stem}_store")).build(source)
+
+    for name, spec in store.manifest["columns"].items():
+        print(f"{name:<24} {'category' if 'categories' in spec else spec['dtype']}")
+    print(f"{store.manifest['rows']:,} rows written to {store.path}")
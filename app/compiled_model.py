@@ -0,0 +1,164 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import argparse
+import json
+import warnings
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from folded_model import decode_ordinal, softmax
+from model_registry import file_digest
+
+app_path = Path(__file__).resolve().parent
+models_path = app_path.parent / "models"
+
+SCHEMA_FILE = "feature_schema.json"
+METADATA_FILE = "model.json"
+
+
+def architecture(state: dict):
+    """Layer sizes read from the state dict instead of hardcoded"""
+
+    hidden1, in_features = state["fc1.weight"].shape
+    hidden2 = state["fc2.weight"].shape[0]
+    out_features = state["fc3.weight"].shape[0]
+
+    return {"in_features": in_features, "hidden1": hidden1, "hidden2": hidden2, "out_features": out_features}
+
+
+def export_compiled(checkpoint: Path, output: Path, schema_path: Path = None):
+    """Scripts, freezes and optimizes the network, and saves it with the
+    feature schema and its own description as extra files"""
+
+    from ordinal_model import PowerfulOrdinalNN
+
+    checkpoint = Path(checkpoint)
+    state = torch.load(checkpoint, map_location="cpu")
+    sizes = architecture(state)
+
+    model = PowerfulOrdinalNN(**sizes)
+    model.load_state_dict(state)
+    model.eval()
+
+    # freezing inlines the weights and folds BatchNorm into the Linear layers
+    module = torch.jit.optimize_for_inference(torch.jit.freeze(torch.jit.script(model)))
+
+    metadata = {
+        **sizes,
+        "output": "ordinal" if sizes["out_features"] == 2 else "multiclass",
+        "source": checkpoint.name,
+        "source_sha256": file_digest(checkpoint),
+        "torch_version": torch.__version__,
+    }
+    schema = Path(schema_path or models_path / SCHEMA_FILE).read_text(encoding="utf-8")
+
+    torch.jit.save(module, str(output), _extra_files={
+        SCHEMA_FILE: schema,
+        METADATA_FILE: json.dumps(metadata, indent=1),
+    })
+
+    return metadata
+
+
+class CompiledModel(nn.Module):
+    """A loaded TorchScript artifact with its schema; no model class needed"""
+
+    def __init__(self, module, schema_spec: dict, metadata: dict):
+
+        super().__init__()
+        self.module = module
+        self.schema_spec = schema_spec
+        self.metadata = metadata
+        self.in_features = metadata["in_features"]
+        self.out_features = metadata["out_features"]
+
+    @property
+    def schema(self):
+        """FeatureSchema of the embedded spec (built on use: it imports pandas)"""
+
+        from feature_schema import FeatureSchema
+
+        spec = self.schema_spec
+        return FeatureSchema(spec["columns"], spec["countries"], spec["encoding_fixes"])
+
+    def forward(self, x):
+
+        return self.module(x)
+
+    @property
+    def n_classes(self):
+
+        return self.out_features + 1 if self.metadata["output"] == "ordinal" else self.out_features
+
+    def predict_proba(self, X):
+
+        return self.predict(X)[1]
+
+    def predict(self, X):
+
+        X = torch.from_numpy(np.array(X, dtype=np.float32, ndmin=2))
+        with torch.inference_mode():
+            logits = self.module(X).numpy()
+
+        if self.metadata["output"] == "ordinal":
+            return decode_ordinal(logits)
+
+        probs = softmax(logits)
+
+        return probs.argmax(axis=1), probs
+
+    def warm_up(self, calls: int = 2):
+        """The first calls of a TorchScript graph run the profiling
+        executor; a server can make them before taking requests"""
+
+        for _ in range(calls):
+            self.predict(np.zeros((1, self.in_features), dtype=np.float32))
+
+        return self
+
+
+def is_stale(path: Path, metadata: dict):
+    """True when the checkpoint the artifact was exported from sits next
+    to it and no longer has the recorded sha256"""
+
+    source = Path(path).with_name(metadata.get("source", ""))
+    if not metadata.get("source") or not source.is_file():
+        return False
+
+    return file_digest(source) != metadata.get("source_sha256")
+
+
+def load_compiled_model(path: Path, warmup: int = 0):
+    """Loads an exported artifact; warns when its source checkpoint has
+    been retrained since the export"""
+
+    extra_files = {SCHEMA_FILE: "", METADATA_FILE: ""}
+    module = torch.jit.load(str(path), map_location="cpu", _extra_files=extra_files)
+
+    model = CompiledModel(module, json.loads(extra_files[SCHEMA_FILE]), json.loads(extra_files[METADATA_FILE]))
+    model.eval()
+
+    if is_stale(path, model.metadata):
+        warnings.warn(f"{Path(path).name} was exported from an older {model.metadata['source']}; "
+                      f"re-export it with compiled_model.py", stacklevel=2)
+
+    return model.warm_up(warmup)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Exports a frozen TorchScript model with its feature schema")
+    parser.add_argument("checkpoint", type=Path, nargs="?", default=models_path / "best_ordinal_nn_model.pth")
+    parser.add_argument("-o", "--output", type=Path, default=models_path / "best_ordinal_nn_model.ts")
+    parser.add_argument("--schema", type=Path, default=models_path / SCHEMA_FILE)
+    args = parser.parse_args()
+
+    metadata = export_compiled(args.checkpoint, args.output, args.schema)
+
+    print(f"Saved {metadata['output']} model "
+          f"({metadata['in_features']} -> {metadata['hidden1']} -> {metadata['hidden2']} -> "
+          f"{metadata['out_features']}) to {args.output}")
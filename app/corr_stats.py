@@ -0,0 +1,98 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import numpy as np
+import pandas as pd
+
+
+class CorrelationStats:
+    """Per-group sufficient statistics for pairwise Pearson correlation.
+
+    For every group g (an economy by default) and column pair (i, j) it keeps,
+    over the rows where both i and j are present:
+
+        n[i, j]   row count
+        s[i, j]   sum of x_i
+        q[i, j]   sum of x_i ** 2
+        g[i, j]   sum of x_i * x_j
+
+    Summing these over any set of groups gives the same matrix as
+    df[rows of those groups].corr(), NaNs handled pairwise, in O(groups * k^2)
+    """
+
+    def __init__(self, df: pd.DataFrame, by: str = "economy", columns=None):
+
+        if columns is None:
+            columns = [col for col in df.select_dtypes(include="number").columns if col != by]
+
+        self.columns = list(columns)
+        self.by = by
+
+        groups = pd.Categorical(df[by])
+        self.groups = list(groups.categories)
+        codes = groups.codes
+
+        X = np.column_stack([np.asarray(df[col], dtype=np.float64) for col in self.columns])
+        present = ~np.isnan(X)
+
+        # correlation is shift invariant; centring on the global means keeps
+        # the raw-moment formulas well conditioned
+        self.shift = np.nanmean(X, axis=0)
+        X = np.where(present, X - self.shift, 0.0)
+        M = present.astype(np.float64)
+
+        k, n_groups = len(self.columns), len(self.groups)
+        self.n = np.zeros((n_groups, k, k))
+        self.s = np.zeros((n_groups, k, k))
+        self.q = np.zeros((n_groups, k, k))
+        self.g = np.zeros((n_groups, k, k))
+
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(n_groups + 1))
+
+        for group in range(n_groups):
+            rows = order[bounds[group]:bounds[group + 1]]
+            x, m = X[rows], M[rows]
+            self.n[group] = m.T @ m
+            self.s[group] = x.T @ m
+            self.q[group] = (x * x).T @ m
+            self.g[group] = x.T @ x
+
+    def _select(self, groups):
+
+        if groups is None:
+            return slice(None)
+
+        index = {name: i for i, name in enumerate(self.groups)}
+
+        return np.array([index[name] for name in groups if name in index], dtype=np.int64)
+
+    def moments(self, groups=None):
+        """Summed (n, s, q, g) over the selected groups (all when None)"""
+
+        selected = self._select(groups)
+
+        return tuple(stat[selected].sum(axis=0) for stat in (self.n, self.s, self.q, self.g))
+
+    def count(self, groups=None):
+
+        n, _, _, _ = self.moments(groups)
+
+        return int(n.diagonal().max()) if len(n) else 0
+
+    def corr(self, groups=None, min_periods: int = 1):
+        """Pearson correlation over the rows of the selected groups"""
+
+        n, s, q, g = self.moments(groups)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = n * g - s * s.T
+            var = n * q - s * s
+            corr = cov / np.sqrt(var * var.T)
+
+        corr = np.clip(corr, -1.0, 1.0)
+        corr[n < max(min_periods, 2)] = np.nan
+        diagonal = np.diag_indices_from(corr)
+        corr[diagonal] = np.where(np.isnan(corr[diagonal]), np.nan, 1.0)
+
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
@@ -0,0 +1,164 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import argparse
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+app_path = Path(__file__).resolve().parent
+data_path = app_path.parent / "data"
+
+# the cleaning steps of notebooks/cleaning_and_etl.ipynb, chunk by chunk
+
+RAW_COLUMNS = ["economy", "female", "age", "inc_q", "emp_in", "account", "borrowed", "saved",
+               "receive_wages", "receive_transfers", "receive_pension", "pay_utilities",
+               "anydigpayment", "mobileowner", "internetaccess", "fin4", "fin8", "fin8b",
+               "fin44a", "fin44b", "fin44c", "fin44d", "fin45"]
+
+# answer codes fit in float32 exactly; float keeps the NaNs until dropna
+RAW_DTYPES = {col: "float32" for col in RAW_COLUMNS if col != "economy"} | {"economy": str}
+
+WORRY_ITEMS = ["fin44a", "fin44b", "fin44c", "fin44d"]
+WORRY_RECODE = {1: 3, 2: 1, 3: 0, 4: 0, 5: 0}
+WORRY_DROP = 6
+
+# raw Findex answer codes -> cleaned flags
+RAW_RECODES = {
+    "female": {2: 0},
+    "emp_in": {2: 0},
+    "receive_wages": {2: 1, 3: 1, 4: 0, 5: 0},
+    "receive_transfers": {2: 1, 3: 1, 4: 0, 5: 0},
+    "receive_pension": {2: 1, 3: 1, 4: 0, 5: 0},
+    "pay_utilities": {2: 1, 3: 1, 4: 0, 5: 0},
+    "mobileowner": {2: 0, 3: 1, 4: 1},
+    "internetaccess": {2: 0, 3: 1, 4: 1},
+    "fin4": {2: 0, 3: 1, 4: 1},
+    "fin8": {2: 0, 3: 1, 4: 1},
+    "fin8b": {2: 0, 3: 1, 4: 0},
+}
+RAW_RENAMES = {"fin4": "debit_card", "fin8": "credit_card", "fin8b": "paid_balance_regularly"}
+RAW_FILLNA = {"debit_card": 0, "credit_card": 0, "paid_balance_regularly": -1}
+
+WORRY_BINS = [-0.5, 0.52, 2.23, 3.5]
+WORRY_LABELS = ["Baixo", "Moderado", "Alto"]
+
+
+def read_chunks(source: Path, columns, chunksize: int = 100_000, encoding: str = "latin1"):
+    """Raw survey in chunks, restricted to `columns` with compact dtypes"""
+
+    return pd.read_csv(source, usecols=columns, dtype={col: RAW_DTYPES[col] for col in columns},
+                       chunksize=chunksize, encoding=encoding)
+
+
+def prescan(source: Path, chunksize: int = 500_000, encoding: str = "latin1"):
+    """fin45 answer counts and economies over the rows with a usable worry
+    answer set; only the five columns involved are read"""
+
+    counts = pd.Series(0, index=[1.0, 2.0, 3.0, 4.0])
+    economies = set()
+
+    with read_chunks(source, ["economy", "fin45"] + WORRY_ITEMS, chunksize, encoding) as reader:
+        for chunk in reader:
+            chunk = chunk[(chunk[WORRY_ITEMS] != WORRY_DROP).all(axis=1)]
+            counts = counts.add(chunk["fin45"].value_counts(), fill_value=0)
+            economies.update(chunk.loc[chunk[WORRY_ITEMS].notna().all(axis=1), "economy"].unique())
+
+    return counts, sorted(economies)
+
+
+def worry_weights(fin45_counts: pd.Series):
+    """Weights of fin44a..d: the fin45 shares of answers 1..4, reversed"""
+
+    freqs = fin45_counts.loc[[1.0, 2.0, 3.0, 4.0]].to_numpy(dtype=np.float64)
+
+    return freqs[::-1] / freqs.sum()
+
+
+def clean_chunk(chunk: pd.DataFrame, weights: np.ndarray):
+    """Raw rows -> cleaned_data.csv rows"""
+
+    chunk = chunk[(chunk[WORRY_ITEMS] != WORRY_DROP).all(axis=1)].copy()
+
+    for col in WORRY_ITEMS:
+        chunk[col] = chunk[col].replace(WORRY_RECODE)
+    chunk["financial_worry"] = chunk[WORRY_ITEMS].to_numpy(dtype=np.float64) @ weights
+    chunk = chunk.drop(columns=WORRY_ITEMS + ["fin45"])
+
+    for col, mapping in RAW_RECODES.items():
+        chunk[col] = chunk[col].replace(mapping)
+    chunk = chunk.rename(columns=RAW_RENAMES).fillna(RAW_FILLNA).dropna()
+
+    flags = [col for col in chunk.columns if col not in ("economy", "financial_worry")]
+
+    return chunk.astype({col: "int16" for col in flags}).reset_index(drop=True)
+
+
+def dummies_chunk(cleaned: pd.DataFrame, economies):
+    """cleaned_data.csv rows -> cleaned_data_dummies.csv rows; the economy
+    categories are fixed up front so every chunk gets the same columns"""
+
+    out = cleaned.drop(columns=["economy", "financial_worry"])
+    out["worry_level"] = pd.cut(cleaned["financial_worry"], bins=WORRY_BINS, labels=WORRY_LABELS,
+                                include_lowest=True)
+    economy = pd.Categorical(cleaned["economy"], categories=economies)
+    dummies = pd.get_dummies(economy, prefix="economy", drop_first=True)
+    dummies.index = out.index
+
+    return pd.concat([out, dummies], axis=1)
+
+
+def run_etl(source: Path, output: Path, dummies_output: Path = None, weights=None,
+            chunksize: int = 100_000, encoding: str = "latin1"):
+    """Streams source into both cleaned files in one pass; a short prescan
+    of five columns supplies the weights (unless given) and the economies"""
+
+    started = time.perf_counter()
+    counts, economies = prescan(source, encoding=encoding)
+    weights = worry_weights(counts) if weights is None else np.asarray(weights, dtype=np.float64)
+
+    rows_in = rows_out = 0
+    dummies_file = open(dummies_output, "w", encoding="utf-8", newline="") if dummies_output else nullcontext()
+
+    with read_chunks(source, RAW_COLUMNS, chunksize, encoding) as reader, \
+            open(output, "w", encoding="utf-8", newline="") as cleaned_file, dummies_file:
+        for chunk in reader:
+            cleaned = clean_chunk(chunk, weights)
+            first = rows_in == 0
+            cleaned.to_csv(cleaned_file, header=first, index=False)
+            if dummies_output:
+                dummies_chunk(cleaned, economies).to_csv(dummies_file, header=first, index=False)
+            rows_in += len(chunk)
+            rows_out += len(cleaned)
+
+    return {
+        "rows_in": rows_in,
+        "rows_out": rows_out,
+        "weights": weights.round(8).tolist(),
+        "economies": len(economies),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Cleans the raw Findex survey into the app's CSV files")
+    parser.add_argument("source", type=Path, nargs="?", default=data_path / "micro_world_139countries.csv")
+    parser.add_argument("-o", "--output", type=Path, default=data_path / "cleaned_data.csv")
+    parser.add_argument("-d", "--dummies", type=Path, default=data_path / "cleaned_data_dummies.csv")
+    parser.add_argument("--no-dummies", action="store_true")
+    parser.add_argument("--weights", type=float, nargs=4, default=None,
+                        help="fin44a..d weights; computed from fin45 when omitted")
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--encoding", default="latin1")
+    args = parser.parse_args()
+
+    stats = run_etl(args.source, args.output, None if args.no_dummies else args.dummies,
+                    args.weights, args.chunksize, args.encoding)
+
+    print(f"{stats['rows_in']:,} raw rows -> {stats['rows_out']:,} cleaned rows "
+          f"({stats['economies']} economies) in {stats['seconds']}s")
+    print(f"financial_worry weights: {stats['weights']}")
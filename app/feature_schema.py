@@ -0,0 +1,137 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+app_path = Path(__file__).resolve().parent
+models_path = app_path.parent / "models"
+data_path = app_path.parent / "data"
+
+# model input order, the same one the Simulator form builds
+NUMERIC_FEATURES = [
+    "female", "age", "inc_q", "emp_in", "account", "borrowed", "saved",
+    "receive_wages", "receive_transfers", "receive_pension", "pay_utilities",
+    "anydigpayment", "mobileowner", "internetaccess", "debit_card",
+    "credit_card", "paid_balance_regularly"
+]
+
+EXCLUDED_COUNTRIES = ["China"]
+
+# the training dummies were read back as latin1, so these names kept the mojibake
+ENCODING_FIXES = {
+    "Côte d'Ivoire": "CÃ´te d'Ivoire",
+    "Türkiye": "TÃ¼rkiye",
+}
+
+
+class FeatureSchema:
+    """Column layout of the 154 model features"""
+
+    def __init__(self, columns, countries, encoding_fixes=None):
+
+        self.columns = list(columns)
+        self.numeric_features = self.columns[:len(NUMERIC_FEATURES)]
+        self.n_features = len(self.columns)
+        self.country_index = dict(countries)
+        self.country_names = list(self.country_index)
+        self.encoding_fixes = dict(encoding_fixes or ENCODING_FIXES)
+
+        self._dummy_countries = [name for name, idx in self.country_index.items() if idx is not None]
+        self._dummy_offsets = np.array([self.country_index[name] for name in self._dummy_countries])
+        self._aliases = {value: key for key, value in self.encoding_fixes.items()}
+
+    @classmethod
+    def load(cls, path: Path = None):
+
+        path = Path(path or models_path / "feature_schema.json")
+        with open(path, "r", encoding="utf-8") as file:
+            spec = json.load(file)
+
+        return cls(spec["columns"], spec["countries"], spec["encoding_fixes"])
+
+    @classmethod
+    def from_survey(cls, path: Path, encoding: str = "latin1", chunksize: int = 200_000):
+        """Builds the schema the way the training notebook did:
+        sorted economies, first one dropped, China removed"""
+
+        names = set()
+        for chunk in pd.read_csv(path, usecols=["economy"], encoding=encoding, chunksize=chunksize):
+            names.update(chunk["economy"].dropna().unique())
+
+        names = [name for name in sorted(names) if name not in EXCLUDED_COUNTRIES]
+        countries = {names[0]: None}
+        columns = list(NUMERIC_FEATURES)
+
+        for name in names[1:]:
+            countries[name] = len(columns)
+            columns.append(f"economy_{ENCODING_FIXES.get(name, name)}")
+
+        return cls(columns, countries, ENCODING_FIXES)
+
+    def save(self, path: Path = None):
+
+        path = Path(path or models_path / "feature_schema.json")
+        spec = {
+            "n_features": self.n_features,
+            "columns": self.columns,
+            "countries": self.country_index,
+            "encoding_fixes": self.encoding_fixes,
+        }
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(spec, file, ensure_ascii=False, indent=1)
+
+    def encode_row(self, values: dict, country: str, out: np.ndarray = None):
+        """Encodes one form submission into a float32 feature vector"""
+
+        country = self._aliases.get(country, country)
+        if country not in self.country_index:
+            raise ValueError(f"Unknown country: {country}")
+
+        if out is None:
+            out = np.zeros(self.n_features, dtype=np.float32)
+        else:
+            out[:] = 0.0
+
+        for i, col in enumerate(self.numeric_features):
+            out[i] = values[col]
+
+        idx = self.country_index[country]
+        if idx is not None:
+            out[idx] = 1.0
+
+        return out
+
+    def encode_frame(self, df: pd.DataFrame):
+        """Vectorized encoding of a cleaned frame. Returns the feature
+        matrix and a mask of rows with every numeric feature present"""
+
+        n_numeric = len(self.numeric_features)
+        X = np.zeros((len(df), self.n_features), dtype=np.float32)
+        X[:, :n_numeric] = df[self.numeric_features].to_numpy(dtype=np.float32)
+
+        economy = df["economy"].replace(self._aliases)
+        codes = pd.Categorical(economy, categories=self._dummy_countries).codes
+        hot = np.flatnonzero(codes >= 0)
+        X[hot, self._dummy_offsets[codes[hot]]] = 1.0
+
+        valid = ~np.isnan(X[:, :n_numeric]).any(axis=1)
+
+        return X, valid
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Builds models/feature_schema.json from the raw survey")
+    parser.add_argument("input", type=Path, nargs="?", default=data_path / "micro_world_139countries.csv")
+    parser.add_argument("-o", "--output", type=Path, default=models_path / "feature_schema.json")
+    args = parser.parse_args()
+
+    schema = FeatureSchema.from_survey(args.input)
+    schema.save(args.output)
+
+    print(f"Saved {schema.n_features} columns, {len(schema.country_names)} countries to {args.output}")
@@ -0,0 +1,26 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import fcntl
+from pathlib import Path
+
+
+class FileLock:
+    """Exclusive flock on a lock file, held for the with block, so only
+    one server process builds a given artifact at a time"""
+
+    def __init__(self, path: Path):
+
+        self.path = Path(path)
+
+    def __enter__(self):
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a+")
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
@@ -0,0 +1,182 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import argparse
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from model_registry import file_digest
+
+app_path = Path(__file__).resolve().parent
+models_path = app_path.parent / "models"
+
+
+def fold_batchnorm(weight, bias, gamma, beta, mean, var, eps: float = 1e-5):
+    """Folds an eval-mode BatchNorm1d into the Linear layer before it"""
+
+    scale = gamma / np.sqrt(var + eps)
+
+    return weight * scale[:, None], (bias - mean) * scale + beta
+
+
+def fold_state_dict(state: dict, eps: float = 1e-5):
+    """PowerfulOrdinalNN state dict (numpy arrays) -> three affine layers"""
+
+    w1, b1 = fold_batchnorm(state["fc1.weight"], state["fc1.bias"],
+                            state["bn1.weight"], state["bn1.bias"],
+                            state["bn1.running_mean"], state["bn1.running_var"], eps)
+    w2, b2 = fold_batchnorm(state["fc2.weight"], state["fc2.bias"],
+                            state["bn2.weight"], state["bn2.bias"],
+                            state["bn2.running_mean"], state["bn2.running_var"], eps)
+
+    return {
+        "w1": w1, "b1": b1,
+        "w2": w2, "b2": b2,
+        "w3": state["fc3.weight"], "b3": state["fc3.bias"],
+    }
+
+
+def decode_ordinal(logits: np.ndarray):
+    """Threshold logits (n, K-1) of the cumulative model -> predicted level
+    and (n, K) level probabilities. P(y > j) = sigmoid(logit_j), made
+    non-increasing in j; P(y = j) = P(y > j-1) - P(y > j). The level is
+    the number of thresholds passed, as train.ordinal_accuracy counts it"""
+
+    # tanh form of the sigmoid: no overflow for large logits
+    exceed = 0.5 + 0.5 * np.tanh(0.5 * np.asarray(logits, dtype=np.float32))
+    np.minimum.accumulate(exceed, axis=1, out=exceed)
+
+    n = len(exceed)
+    cumulative = np.hstack([np.ones((n, 1), np.float32), exceed, np.zeros((n, 1), np.float32)])
+
+    return (exceed > 0.5).sum(axis=1), cumulative[:, :-1] - cumulative[:, 1:]
+
+
+def softmax(logits: np.ndarray):
+
+    logits = logits - logits.max(axis=1, keepdims=True)
+    np.exp(logits, out=logits)
+    logits /= logits.sum(axis=1, keepdims=True)
+
+    return logits
+
+
+class FoldedOrdinalNN:
+    """NumPy-only forward pass of PowerfulOrdinalNN in eval mode:
+    Linear -> ReLU -> Linear -> ReLU -> Linear"""
+
+    def __init__(self, layers: dict):
+
+        # stored transposed and contiguous so the forward pass is X @ W
+        self.w1 = np.ascontiguousarray(layers["w1"].T, dtype=np.float32)
+        self.b1 = np.asarray(layers["b1"], dtype=np.float32)
+        self.w2 = np.ascontiguousarray(layers["w2"].T, dtype=np.float32)
+        self.b2 = np.asarray(layers["b2"], dtype=np.float32)
+        self.w3 = np.ascontiguousarray(layers["w3"].T, dtype=np.float32)
+        self.b3 = np.asarray(layers["b3"], dtype=np.float32)
+
+        self.in_features = self.w1.shape[0]
+        self.out_features = self.w3.shape[1]
+
+    @classmethod
+    def from_checkpoint(cls, path: Path):
+        """Compiles a .pth state dict (needs torch)"""
+
+        import torch
+
+        ckpt = torch.load(path, map_location="cpu")
+        state = {key: value.detach().cpu().numpy().astype(np.float64) for key, value in ckpt.items()}
+
+        return cls(fold_state_dict(state))
+
+    @property
+    def ordinal(self):
+        """Two threshold logits; the multiclass head has one logit per level"""
+
+        return self.out_features == 2
+
+    @property
+    def n_classes(self):
+
+        return self.out_features + 1 if self.ordinal else self.out_features
+
+    @classmethod
+    def load(cls, path: Path):
+        """Loads a compiled .npz (no torch needed); warns when the
+        checkpoint it was folded from has been retrained since"""
+
+        path = Path(path)
+        with np.load(path) as arrays:
+            layers = {key: arrays[key] for key in arrays.files}
+
+        if "source" in layers:
+            source = path.with_name(str(layers["source"]))
+            if source.is_file() and file_digest(source) != str(layers["source_sha256"]):
+                warnings.warn(f"{path.name} was folded from an older {source.name}; "
+                              f"re-run folded_model.py", stacklevel=2)
+
+        return cls(layers)
+
+    def save(self, path: Path, source: Path = None):
+        """Writes the layers, and the name and sha256 of the checkpoint
+        they were folded from when given"""
+
+        extra = {"source": np.array(Path(source).name), "source_sha256": np.array(file_digest(source))} if source else {}
+        np.savez(path, w1=self.w1.T, b1=self.b1, w2=self.w2.T, b2=self.b2, w3=self.w3.T, b3=self.b3, **extra)
+
+    def __call__(self, X):
+        """Logits for a (n, 154) float32 batch"""
+
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+
+        h = X @ self.w1
+        h += self.b1
+        np.maximum(h, 0.0, out=h)
+
+        h = h @ self.w2
+        h += self.b2
+        np.maximum(h, 0.0, out=h)
+
+        logits = h @ self.w3
+        logits += self.b3
+
+        return logits
+
+    def predict_proba(self, X):
+        """(n, n_classes) probabilities of Low, Medium and High stress"""
+
+        return self.predict(X)[1]
+
+    def predict(self, X):
+
+        if self.ordinal:
+            return decode_ordinal(self(X))
+
+        probs = softmax(self(X))
+
+        return probs.argmax(axis=1), probs
+
+
+def load_folded_model(path: Path):
+    """Registry loader: .npz is read directly, a .pth is folded on load"""
+
+    path = Path(path)
+    if path.suffix == ".npz":
+        return FoldedOrdinalNN.load(path)
+
+    return FoldedOrdinalNN.from_checkpoint(path)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Folds BatchNorm into the ordinal network and saves a NumPy artifact")
+    parser.add_argument("checkpoint", type=Path, nargs="?", default=models_path / "best_ordinal_nn_model.pth")
+    parser.add_argument("-o", "--output", type=Path, default=models_path / "best_ordinal_nn_model.npz")
+    args = parser.parse_args()
+
+    model = FoldedOrdinalNN.from_checkpoint(args.checkpoint)
+    model.save(args.output, source=args.checkpoint)
+
+    print(f"Saved folded model ({model.in_features} -> {model.out_features}) to {args.output}")
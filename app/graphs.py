@@ -1,9 +1,11 @@
 # Utils Functions
 import streamlit as st
 from datetime import datetime
-from streamlit_echarts import st_echarts
 import numpy as np
 
+from chart_cache import cached_chart
+from chart_data import boxplot_summary, density_bins, heatmap_cells
+
 class Graphs:
     """Utils functions"""
 
@@ -12,8 +14,8 @@ class Graphs:
         self.start = datetime(2000, 1, 1)
         self.end = datetime.today()
 
-    @st.cache_resource(show_spinner=False)
-    def echart_dict(_self, data):
+    @cached_chart("age_line")
+    def echart_dict(self, data):
         """Renders Java Script Graphics"""
 
 
@@ -154,18 +156,12 @@ class Graphs:
         return options
 
 
+    @cached_chart("heatmap")
     def correlation_heatmap(self, corr):
     
-        mask = np.triu(np.ones_like(corr, dtype=bool))
-
-        data = []
+        data = heatmap_cells(corr)
         columns = list(corr.columns)
 
-        for i in range(len(columns)):
-            for j in range(len(columns)):
-                if not mask[i, j]:
-                    data.append([j, i, round(corr.iloc[i, j], 2)])
-
         option = {
             "tooltip": {
                 "position": "top"
@@ -223,6 +219,7 @@ class Graphs:
         return option
     
 
+    @cached_chart("histogram")
     def histogram(self, df, var):
 
         values = df["values"]
@@ -281,6 +278,7 @@ class Graphs:
         return option
     
 
+    @cached_chart("pie")
     def pie_plot(self, df, var):
 
         freq = df["values"].value_counts().sort_index()
@@ -338,9 +336,12 @@ class Graphs:
         return option
 
 
+    @cached_chart("boxplot")
     def boxplot(self, df, var, title_var):
 
-        source = [group["financial_worry"].tolist() for name, group in df.groupby(var)]
+        # quartiles, whiskers and outliers are computed here, so the
+        # browser gets a few numbers per group instead of every row
+        names, boxes, outliers = boxplot_summary(df, var)
 
         option = {
             "color": "#fba725",
@@ -369,23 +370,6 @@ class Graphs:
                     "top": "90%"
                 }
             ],
-            "dataset": [
-                {
-                    "source": source
-                },
-                {
-                    "transform": {
-                        "type": "boxplot",
-                        "config": {
-                            "itemNameFormatter": "{value}"
-                        }
-                    }
-                },
-                {
-                    "fromDatasetIndex": 1,
-                    "fromTransformResult": 1
-                }
-            ],
             "tooltip": {
                 "trigger": "item",
                 "axisPointer": {
@@ -399,6 +383,7 @@ class Graphs:
             },
             "xAxis": {
                 "type": "category",
+                "data": [str(name) for name in names],
                 "boundaryGap": True,
                 "nameGap": 30,
                 "splitArea": {"show": False},
@@ -413,7 +398,7 @@ class Graphs:
                 {
                     "name": "boxplot",
                     "type": "boxplot",
-                    "datasetIndex": 1,
+                    "data": boxes,
                     "itemStyle": {
                         "color": "#3E4144",
                         "borderColor": "#fba725"
@@ -422,7 +407,7 @@ class Graphs:
                 {
                     "name": "outlier",
                     "type": "scatter",
-                    "datasetIndex": 2
+                    "data": outliers
                 }
             ]
         }
@@ -430,12 +415,16 @@ class Graphs:
         return option
     
 
-    def scatter_plot(self, df):
+    def scatter_plot(self, df, density_threshold: int = 5_000):
 
         df = df[["inc_q", "financial_worry"]].fillna(0)
-        
-        data = [[int(df["inc_q"].iloc[i]), 
-                 int(df["financial_worry"].iloc[i])] for i in range(len(df))]
+        x = df["inc_q"].to_numpy().astype(np.int64)
+        y = df["financial_worry"].to_numpy().astype(np.int64)
+
+        # above the threshold, one point per (inc_q, worry) cell sized by its
+        # count keeps the payload bounded however many rows are selected
+        density = len(df) > density_threshold
+        data = density_bins(x, y) if density else np.column_stack([x, y]).tolist()
 
         option = {
             "color": "#fba725",
@@ -475,6 +464,17 @@ class Graphs:
             ]
         }
 
+        if density:
+            counts = [count for _, _, count in data]
+            option["visualMap"] = {
+                "show": False,
+                "dimension": 2,
+                "min": min(counts),
+                "max": max(counts),
+                "inRange": {"symbolSize": [8, 40]}
+            }
+            option["tooltip"] = {"trigger": "item", "formatter": "{c}"}
+
         return option
     
     
@@ -538,4 +538,138 @@ class Graphs:
             ]
         }
 
-        return option
\ No newline at end of file
+        return option
+
+
+    def sensitivity_bar(self, sweep):
+        """Change in stress probability when each checkbox is flipped"""
+
+        flags = sorted(sweep["flags"].items(), key=lambda item: item[1]["delta"])
+        names = [f"{'With' if flag['on'] else 'Without'}: {name}" for name, flag in flags]
+
+        option = {
+            "backgroundColor": "#0E1117",
+            "title": {
+                "text": "Flipping Each Answer",
+                "subtext": "Change in stress probability, percentage points"
+            },
+            "tooltip": {
+                "trigger": "axis",
+                "axisPointer": {"type": "shadow"}
+            },
+            "grid": {"top": 80, "bottom": 30, "left": 230},
+            "xAxis": {
+                "type": "value",
+                "splitLine": {"lineStyle": {"type": "dashed"}}
+            },
+            "yAxis": {
+                "type": "category",
+                "axisTick": {"show": False},
+                "data": names
+            },
+            "series": [
+                {
+                    "name": "Change",
+                    "type": "bar",
+                    "data": [
+                        {
+                            "value": round(flag["delta"] * 100, 2),
+                            "itemStyle": {"color": "#ee6666" if flag["delta"] > 0 else "#91cc75"}
+                        }
+                        for _, flag in flags
+                    ]
+                }
+            ]
+        }
+
+        return option
+
+
+    def sensitivity_line(self, values: dict, title: str, x_name: str, current=None):
+        """Stress probability along one input, the submitted value marked"""
+
+        option = {
+            "color": "#fba725",
+            "backgroundColor": "#0E1117",
+            "title": {"text": title},
+            "tooltip": {"trigger": "axis"},
+            "grid": {"top": 70, "bottom": 40},
+            "xAxis": {
+                "type": "category",
+                "name": x_name,
+                "nameLocation": "middle",
+                "nameGap": 25,
+                "data": list(values)
+            },
+            "yAxis": {
+                "type": "value",
+                "name": "Stress probability (%)",
+                "splitLine": {"lineStyle": {"type": "dashed"}}
+            },
+            "series": [
+                {
+                    "name": "Stress probability",
+                    "type": "line",
+                    "showSymbol": len(values) <= 10,
+                    "data": [round(value * 100, 2) for value in values.values()],
+                    "markLine": {
+                        "symbol": "none",
+                        "label": {"formatter": "you"},
+                        "data": [{"xAxis": list(values).index(current)}] if current in values else []
+                    }
+                }
+            ]
+        }
+
+        return option
+
+
+    @cached_chart("predicted_stress")
+    def predicted_stress_bar(self, countries, counts, labels):
+        """Share of respondents per predicted stress level, one stacked bar
+        per country, highest predicted stress first"""
+
+        counts = np.asarray(counts, dtype=np.float64)
+        totals = counts.sum(axis=1)
+        keep = totals > 0
+        shares = counts[keep] / totals[keep, None] * 100
+        names = np.asarray(countries, dtype=object)[keep]
+
+        order = np.argsort(-shares[:, 0], kind="stable")
+        colors = ["#91cc75", "#fba725", "#ee6666"]
+
+        option = {
+            "backgroundColor": "#0E1117",
+            "tooltip": {
+                "trigger": "axis",
+                "axisPointer": {"type": "shadow"}
+            },
+            "legend": {"top": 0},
+            "grid": {"top": 40, "bottom": 30, "left": 160, "right": 50},
+            "dataZoom": [
+                {"type": "slider", "yAxisIndex": 0, "startValue": max(len(names) - 20, 0),
+                 "endValue": len(names) - 1, "right": 10},
+                {"type": "inside", "yAxisIndex": 0}
+            ],
+            "xAxis": {
+                "type": "value",
+                "max": 100,
+                "axisLabel": {"formatter": "{value}%"}
+            },
+            "yAxis": {
+                "type": "category",
+                "data": names[order].tolist()
+            },
+            "series": [
+                {
+                    "name": label,
+                    "type": "bar",
+                    "stack": "share",
+                    "itemStyle": {"color": colors[i % len(colors)]},
+                    "data": np.round(shares[order, i], 1).tolist()
+                }
+                for i, label in enumerate(labels)
+            ]
+        }
+
+        return option
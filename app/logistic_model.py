@@ -0,0 +1,137 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import argparse
+import json
+import pickle
+from pathlib import Path
+
+import numpy as np
+
+app_path = Path(__file__).resolve().parent
+models_path = app_path.parent / "models"
+
+# worry_level labels of the training data -> Simulator class ids
+CLASS_IDS = {"Baixo": 0, "Moderado": 1, "Alto": 2}
+
+_NUMPY_GLOBALS = {
+    ("numpy._core.multiarray", "_reconstruct"),
+    ("numpy.core.multiarray", "_reconstruct"),
+    ("numpy", "ndarray"),
+    ("numpy", "dtype"),
+}
+
+
+class _Estimator:
+    """Stand-in for the pickled sklearn estimator: keeps its attributes"""
+
+    def __setstate__(self, state):
+
+        self.__dict__.update(state)
+
+
+class _Unpickler(pickle.Unpickler):
+    """Resolves only NumPy arrays and the estimator class, so reading the
+    pickle needs neither sklearn nor arbitrary imports"""
+
+    def find_class(self, module, name):
+
+        if (module, name) in _NUMPY_GLOBALS:
+            return super().find_class(module, name)
+        if module.startswith("sklearn.linear_model") and name == "LogisticRegression":
+            return _Estimator
+
+        raise pickle.UnpicklingError(f"{module}.{name} is not allowed in a logistic regression pickle")
+
+
+class LogisticScorer:
+    """Multinomial logistic regression as one matrix product and a softmax"""
+
+    def __init__(self, coef, intercept, feature_names=None, sklearn_version: str = None):
+
+        # rows ordered by class id (Baixo, Moderado, Alto); stored transposed
+        self.weights = np.ascontiguousarray(np.asarray(coef, dtype=np.float32).T)
+        self.bias = np.asarray(intercept, dtype=np.float32)
+        self.feature_names = list(feature_names or [])
+        self.sklearn_version = sklearn_version
+        self.n_classes = len(self.bias)
+
+    @classmethod
+    def from_pickle(cls, path: Path):
+        """Reads coef_/intercept_ straight from the sklearn pickle"""
+
+        with open(path, "rb") as file:
+            estimator = _Unpickler(file).load()
+
+        order = [list(estimator.classes_).index(label) for label in CLASS_IDS]
+
+        return cls(estimator.coef_[order], estimator.intercept_[order],
+                   [str(name) for name in estimator.feature_names_in_],
+                   getattr(estimator, "_sklearn_version", None))
+
+    @classmethod
+    def load(cls, path: Path):
+
+        with open(path, "r", encoding="utf-8") as file:
+            spec = json.load(file)
+
+        return cls(spec["coef"], spec["intercept"], spec["feature_names"], spec.get("sklearn_version"))
+
+    def save(self, path: Path):
+
+        spec = {
+            "kind": "multinomial_logistic_regression",
+            "classes": list(CLASS_IDS),
+            "feature_names": self.feature_names,
+            "coef": self.weights.T.astype(np.float64).tolist(),
+            "intercept": self.bias.astype(np.float64).tolist(),
+            "sklearn_version": self.sklearn_version,
+        }
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(spec, file, ensure_ascii=False)
+
+        return path
+
+    def __call__(self, X: np.ndarray):
+        """Class scores (logits)"""
+
+        return np.atleast_2d(np.asarray(X, dtype=np.float32)) @ self.weights + self.bias
+
+    def predict_proba(self, X: np.ndarray):
+
+        scores = self(X)
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def predict(self, X: np.ndarray):
+        """(class ids, probabilities), the interface of the ordinal models"""
+
+        probs = self.predict_proba(X)
+
+        return probs.argmax(axis=1), probs
+
+
+def load_logistic_model(path: Path):
+    """Registry loader: the JSON artifact, or the pickle next to it"""
+
+    path = Path(path)
+    if path.suffix == ".json":
+        return LogisticScorer.load(path)
+
+    return LogisticScorer.from_pickle(path)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Extracts the logistic regression into a JSON artifact")
+    parser.add_argument("source", type=Path, nargs="?", default=models_path / "basic_logistic_regression.pkl")
+    parser.add_argument("-o", "--output", type=Path, default=models_path / "basic_logistic_regression.json")
+    args = parser.parse_args()
+
+    scorer = LogisticScorer.from_pickle(args.source)
+    scorer.save(args.output)
+
+    print(f"{scorer.n_classes} classes x {len(scorer.feature_names)} features "
+          f"(sklearn {scorer.sklearn_version}) written to {args.output}")
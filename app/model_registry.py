@@ -0,0 +1,139 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import hashlib
+import threading
+import time
+from pathlib import Path
+
+
+def load_ordinal_model(path: Path):
+    """Default loader, imported lazily so torch stays optional"""
+
+    import ordinal_model
+
+    return ordinal_model.load_ordinal_model(path)
+
+
+def file_digest(path: Path):
+    """sha256 of a checkpoint file"""
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+class _Entry:
+    """One loaded checkpoint and its counters"""
+
+    def __init__(self, path: Path, loader):
+
+        self.path = path
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.model = None
+        self.mtime_ns = None
+        self.size = None
+        self.sha256 = None
+        self.load_seconds = None
+        self.loads = 0
+        self.hits = 0
+
+    def load(self):
+
+        stat = self.path.stat()
+        started = time.perf_counter()
+        sha256 = file_digest(self.path)
+        model = self.loader(self.path)
+
+        self.model, self.sha256 = model, sha256
+        self.mtime_ns, self.size = stat.st_mtime_ns, stat.st_size
+        self.load_seconds = time.perf_counter() - started
+        self.loads += 1
+
+    def is_stale(self):
+        """True when the file on disk no longer matches the loaded weights"""
+
+        stat = self.path.stat()
+        if (stat.st_mtime_ns, stat.st_size) == (self.mtime_ns, self.size):
+            return False
+
+        if stat.st_size == self.size and file_digest(self.path) == self.sha256:
+            self.mtime_ns = stat.st_mtime_ns
+            return False
+
+        return True
+
+
+class ModelRegistry:
+    """Process-wide registry handing out eval-mode models,
+    loaded once and reloaded when the checkpoint changes"""
+
+    def __init__(self):
+
+        self._entries = {}
+        self._aliases = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, path: Path, loader):
+
+        # path as given -> entry, so hot lookups skip resolve()
+        alias = (str(path), loader)
+        entry = self._aliases.get(alias)
+        if entry is not None:
+            return entry
+
+        key = (str(Path(path).resolve()), getattr(loader, "__qualname__", repr(loader)))
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = _Entry(Path(key[0]), loader)
+            self._aliases[alias] = self._entries[key]
+            return self._entries[key]
+
+    def get(self, path: Path, loader=load_ordinal_model):
+        """Returns the model for path, loading or reloading it if needed"""
+
+        return self.get_versioned(path, loader)[0]
+
+    def get_versioned(self, path: Path, loader=load_ordinal_model):
+        """(model, sha256) for path, read together under the entry lock so
+        the hash always describes the weights of the model returned"""
+
+        entry = self._entry(path, loader)
+
+        with entry.lock:
+            if entry.model is None or entry.is_stale():
+                entry.load()
+            else:
+                entry.hits += 1
+            return entry.model, entry.sha256
+
+    def clear(self):
+
+        with self._lock:
+            self._entries.clear()
+            self._aliases.clear()
+
+    def stats(self):
+
+        with self._lock:
+            entries = list(self._entries.values())
+
+        return [
+            {
+                "path": str(entry.path),
+                "loader": getattr(entry.loader, "__qualname__", repr(entry.loader)),
+                "sha256": entry.sha256,
+                "loads": entry.loads,
+                "hits": entry.hits,
+                "load_seconds": round(entry.load_seconds, 4) if entry.load_seconds else None,
+            }
+            for entry in entries
+        ]
+
+
+# shared by every Streamlit session in this process
+registry = ModelRegistry()
@@ -1,16 +1,18 @@
+import torch
 import torch.nn as nn
 
 class PowerfulOrdinalNN(nn.Module):
-    def __init__(self, in_features: int = 154, hidden1: int = 128, hidden2: int = 64, out_features: int = 2):
+    def __init__(self, in_features: int = 154, hidden1: int = 128, hidden2: int = 64, out_features: int = 2,
+                 dropout: float = 0.4):
         super().__init__()
         self.fc1      = nn.Linear(in_features, hidden1)
         self.bn1      = nn.BatchNorm1d(hidden1)
         self.relu1    = nn.ReLU()
-        self.dropout1 = nn.Dropout(0.4)
+        self.dropout1 = nn.Dropout(dropout)
         self.fc2      = nn.Linear(hidden1, hidden2)
         self.bn2      = nn.BatchNorm1d(hidden2)
         self.relu2    = nn.ReLU()
-        self.dropout2 = nn.Dropout(0.4)
+        self.dropout2 = nn.Dropout(dropout)
         self.fc3      = nn.Linear(hidden2, out_features)
 
     def forward(self, x):
@@ -24,3 +26,32 @@ class PowerfulOrdinalNN(nn.Module):
         x = self.dropout2(x)
         x = self.fc3(x)
         return x
+
+
+class MulticlassNN(PowerfulOrdinalNN):
+    """Same body as PowerfulOrdinalNN with one logit per worry level,
+    trained with class-weighted cross-entropy"""
+
+    def __init__(self, in_features: int = 154, hidden1: int = 128, hidden2: int = 64, out_features: int = 3,
+                 dropout: float = 0.4):
+        super().__init__(in_features, hidden1, hidden2, out_features, dropout)
+
+
+def load_ordinal_model(path):
+    """Loads the trained ordinal network in eval mode"""
+
+    model = PowerfulOrdinalNN(in_features=154, hidden1=128, hidden2=64, out_features=2)
+    ckpt = torch.load(path, map_location="cpu")
+    model.load_state_dict(ckpt)
+    model.eval()
+    return model
+
+
+def load_multiclass_model(path):
+    """Loads the trained multiclass network in eval mode"""
+
+    model = MulticlassNN(in_features=154, hidden1=128, hidden2=64, out_features=3)
+    ckpt = torch.load(path, map_location="cpu")
+    model.load_state_dict(ckpt)
+    model.eval()
+    return model
@@ -0,0 +1,120 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from model_registry import load_ordinal_model, registry
+
+
+class PredictionCache:
+    """LRU of single-row predictions keyed on the encoded feature vector.
+
+    Entries are tagged with the sha256 the registry reports for the model,
+    so when the checkpoint changes on disk its old predictions are dropped
+    on the next lookup instead of being served"""
+
+    def __init__(self, max_entries: int = 4096):
+
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, model_key, version: str):
+        """Drops the entries of model_key made with other weights (lock held)"""
+
+        if self._versions.get(model_key, version) != version:
+            stale = [key for key in self._entries if key[0] == model_key]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        self._versions[model_key] = version
+
+    def predict(self, X: np.ndarray, path: Path, loader=load_ordinal_model):
+        """(class ids, probabilities) for the rows of X; only the rows not
+        seen before go through the model, in one batch"""
+
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        # one call, so a reload cannot slip between the model and its hash
+        model, version = registry.get_versioned(path, loader)
+        model_key = (str(path), getattr(loader, "__qualname__", repr(loader)))
+
+        keys = [(model_key, row.tobytes()) for row in X]
+        found = [None] * len(keys)
+
+        with self._lock:
+            self._check_version(model_key, version)
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    found[i] = entry
+            n_found = sum(entry is not None for entry in found)
+            self.hits += n_found
+            self.misses += len(keys) - n_found
+
+        missing = [i for i, entry in enumerate(found) if entry is None]
+        if missing:
+            preds, probs = model.predict(X[missing])
+            fresh = [(int(class_id), row.copy()) for class_id, row in zip(preds, probs)]
+            with self._lock:
+                # another session may have seen newer weights meanwhile
+                current = self._versions.get(model_key) == version
+                for i, entry in zip(missing, fresh):
+                    found[i] = entry
+                    if current:
+                        self._put(keys[i], entry)
+
+        preds = np.array([class_id for class_id, _ in found])
+        probs = np.stack([row for _, row in found])
+
+        return preds, probs
+
+    def _put(self, key, entry):
+        """Inserts and evicts down to max_entries (lock held)"""
+
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def resize(self, max_entries: int):
+
+        with self._lock:
+            self.max_entries = max_entries
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def stats(self):
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+# shared by every Streamlit session in this process
+prediction_cache = PredictionCache()
@@ -0,0 +1,346 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import Counter, deque
+from pathlib import Path
+
+import numpy as np
+
+from feature_schema import FeatureSchema
+from folded_model import load_folded_model
+from model_registry import registry
+from prediction_cache import prediction_cache
+
+app_path = Path(__file__).resolve().parent
+models_path = app_path.parent / "models"
+
+CLASS_LABELS = {0: "Low Stress", 1: "Medium Stress", 2: "High Stress"}
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class ServiceBusy(Exception):
+    """Raised when the request queue is full"""
+
+
+class InvalidRequest(Exception):
+    """Raised for a payload that fails validation; the only 400 of /predict"""
+
+
+class BatchTooLarge(Exception):
+    """Raised for a rows request that could never fit in the queue"""
+
+
+class ServiceMetrics:
+    """Latency and batch-size counters"""
+
+    def __init__(self, window: int = 10_000):
+
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = Counter()
+        self.requests = 0
+        self.rejected = 0
+
+    def observe_batch(self, size: int):
+
+        # power-of-two buckets: 1, 2, 4, 8, ...
+        self.batch_sizes[1 << (size - 1).bit_length()] += 1
+
+    def observe_latency(self, seconds: float):
+
+        self.requests += 1
+        self.latencies.append(seconds)
+
+    def snapshot(self):
+
+        latencies = np.array(self.latencies) * 1e3 if self.latencies else np.zeros(1)
+
+        return {
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "latency_ms": {
+                "p50": round(float(np.percentile(latencies, 50)), 3),
+                "p99": round(float(np.percentile(latencies, 99)), 3),
+            },
+            "batch_size_histogram": {f"<={size}": count for size, count in sorted(self.batch_sizes.items())},
+        }
+
+
+class MicroBatcher:
+    """Merges requests that arrive within window_ms into one forward pass"""
+
+    def __init__(self, predict, window_ms: float = 2.0, max_batch: int = 256,
+                 max_queue: int = 1024, metrics: ServiceMetrics = None):
+
+        self.predict = predict
+        self.window = window_ms / 1e3
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.metrics = metrics or ServiceMetrics()
+        self._task = None
+
+    def start(self):
+
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, x: np.ndarray):
+        """Queues one encoded row; resolves to (class, probabilities)"""
+
+        return (await self.submit_many([x]))[0]
+
+    async def submit_many(self, rows):
+        """Queues every row or none: the free space is checked and the rows
+        put without awaiting in between, so no other request can take the
+        room, and a rejected request leaves nothing behind to be scored.
+        Resolves to one (class, probabilities) per row"""
+
+        loop = asyncio.get_running_loop()
+        if self.queue.maxsize and self.queue.maxsize - self.queue.qsize() < len(rows):
+            self.metrics.rejected += 1
+            raise ServiceBusy("prediction queue is full")
+
+        futures = []
+        for x in rows:
+            future = loop.create_future()
+            self.queue.put_nowait((x, future))
+            futures.append(future)
+
+        return await asyncio.gather(*futures)
+
+    async def _collect(self):
+
+        batch = [await self.queue.get()]
+
+        # sleep out the window rather than wait_for(queue.get()), which can
+        # swallow a cancellation on 3.11 and leave stop() waiting forever
+        if self.window > 0 and self.queue.qsize() < self.max_batch - 1:
+            await asyncio.sleep(self.window)
+
+        while len(batch) < self.max_batch and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+
+        return batch
+
+    async def _run(self):
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = await self._collect()
+            X = np.stack([x for x, _ in batch])
+            self.metrics.observe_batch(len(batch))
+
+            try:
+                preds, probs = await loop.run_in_executor(None, self.predict, X)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            for i, (_, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result((int(preds[i]), probs[i].tolist()))
+
+
+class PredictionService:
+    """HTTP front end for the ordinal network, same encoding as Simulator"""
+
+    def __init__(self, model_path: Path = None, schema_path: Path = None,
+                 window_ms: float = 2.0, max_batch: int = 256, max_queue: int = 1024,
+                 max_body: int = 1 << 20):
+
+        self.model_path = Path(model_path or models_path / "best_ordinal_nn_model.npz")
+        self.schema = FeatureSchema.load(schema_path or models_path / "feature_schema.json")
+        self.metrics = ServiceMetrics()
+        self.batcher = MicroBatcher(self.predict, window_ms, max_batch, max_queue, self.metrics)
+        # a rows request larger than the queue could never be admitted
+        self.max_rows = max_queue
+        self.max_body = max_body
+
+    def predict(self, X: np.ndarray):
+
+        return prediction_cache.predict(X, self.model_path, load_folded_model)
+
+    def validate(self, body: bytes):
+        """Parses and encodes a /predict body before anything is scored.
+        Returns the encoded rows and whether the request was a batch"""
+
+        try:
+            payload = json.loads(body or b"{}")
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise InvalidRequest(f"body is not JSON: {exc}") from None
+        if not isinstance(payload, dict):
+            raise InvalidRequest("body must be a JSON object")
+
+        batched = "rows" in payload
+        rows = payload["rows"] if batched else [payload]
+        if not isinstance(rows, list) or not rows:
+            raise InvalidRequest("rows must be a non-empty list")
+        if len(rows) > self.max_rows:
+            raise BatchTooLarge(f"{len(rows)} rows, at most {self.max_rows} per request")
+
+        encoded = []
+        for i, row in enumerate(rows):
+            where = f"rows[{i}]" if batched else "request"
+            if not isinstance(row, dict):
+                raise InvalidRequest(f"{where} must be an object")
+
+            features, country = row.get("features"), row.get("country")
+            if not isinstance(features, dict):
+                raise InvalidRequest(f"{where}.features must be an object")
+            for name in self.schema.numeric_features:
+                value = features.get(name)
+                if not isinstance(value, (int, float)) or not math.isfinite(value):
+                    raise InvalidRequest(f"{where}.features.{name} must be a finite number")
+            if not isinstance(country, str):
+                raise InvalidRequest(f"{where}.country must be a string")
+
+            try:
+                encoded.append(self.schema.encode_row(features, country))
+            except ValueError as exc:
+                raise InvalidRequest(f"{where}: {exc}") from None
+
+        return encoded, batched
+
+    async def predict_rows(self, rows):
+        """Scores the encoded rows of one request, admitted all at once"""
+
+        results = await self.batcher.submit_many(rows)
+
+        return [{"class": class_id, "label": CLASS_LABELS[class_id], "probabilities": probs}
+                for class_id, probs in results]
+
+    async def dispatch(self, method: str, path: str, body: bytes = b""):
+        """Routes one request; returns (status, payload)"""
+
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/metrics":
+            return 200, {**self.metrics.snapshot(), "models": registry.stats(),
+                         "prediction_cache": prediction_cache.stats()}
+        if path != "/predict":
+            return 404, {"error": f"unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+
+        started = time.perf_counter()
+        try:
+            rows, batched = self.validate(body)
+        except InvalidRequest as exc:
+            return 400, {"error": f"invalid request: {exc}"}
+        except BatchTooLarge as exc:
+            return 413, {"error": str(exc)}
+
+        # past validation, a failure is the service's, not the client's
+        try:
+            results = await self.predict_rows(rows)
+        except ServiceBusy as exc:
+            return 503, {"error": str(exc)}
+        except Exception as exc:
+            return 500, {"error": f"prediction failed: {type(exc).__name__}"}
+
+        self.metrics.observe_latency(time.perf_counter() - started)
+
+        return 200, {"predictions": results} if batched else results[0]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+
+        try:
+            request_line = await reader.readline()
+            method, path, _ = request_line.decode("latin1").split(" ", 2)
+
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                key, _, value = line.decode("latin1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", 0))
+            if length > self.max_body:
+                status, payload = 413, {"error": "request body too large"}
+            else:
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self.dispatch(method, path.split("?")[0], body)
+        except (ValueError, asyncio.IncompleteReadError):
+            status, payload = 400, {"error": "malformed HTTP request"}
+        except Exception as exc:
+            status, payload = 500, {"error": f"internal error: {type(exc).__name__}"}
+
+        data = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+            f"Connection: close\r\n\r\n".encode() + data
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8502):
+
+        self.batcher.start()
+        server = await asyncio.start_server(self._handle, host, port)
+
+        async with server:
+            await server.serve_forever()
+
+
+class InProcessClient:
+    """Calls the service routes directly, without sockets"""
+
+    def __init__(self, service: PredictionService):
+
+        self.service = service
+
+    async def __aenter__(self):
+
+        self.service.batcher.start()
+        return self
+
+    async def __aexit__(self, *exc):
+
+        await self.service.batcher.stop()
+
+    async def get(self, path: str):
+
+        return await self.service.dispatch("GET", path)
+
+    async def post(self, path: str, payload: dict):
+
+        return await self.service.dispatch("POST", path, json.dumps(payload).encode())
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Micro-batching prediction service for PowerfulOrdinalNN")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--max-queue", type=int, default=1024)
+    parser.add_argument("--cache-entries", type=int, default=prediction_cache.max_entries)
+    args = parser.parse_args()
+
+    prediction_cache.resize(args.cache_entries)
+    service = PredictionService(window_ms=args.window_ms, max_batch=args.max_batch, max_queue=args.max_queue)
+
+    print(f"Serving on http://{args.host}:{args.port} (window {args.window_ms} ms, batch <= {args.max_batch})")
+    asyncio.run(service.serve(args.host, args.port))
@@ -0,0 +1,124 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from folded_model import FoldedOrdinalNN
+
+app_path = Path(__file__).resolve().parent
+models_path = app_path.parent / "models"
+
+
+def quantize_weight(weight: np.ndarray):
+    """Symmetric per-output-channel int8: weight ~= codes * scale[:, None]"""
+
+    scale = np.abs(weight).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0
+    codes = np.clip(np.rint(weight / scale[:, None]), -127, 127).astype(np.int8)
+
+    return codes, scale.astype(np.float32)
+
+
+def quantize_rows(X: np.ndarray, levels: int, keep_integers: bool = False):
+    """Dynamic per-row activation quantization to integers in [-levels, levels],
+    in place. With keep_integers, rows that already hold small integers (the
+    survey encoding does) keep scale 1 and are represented exactly"""
+
+    absmax = np.abs(X).max(axis=1, keepdims=True)
+    scale = absmax / levels
+    if keep_integers:
+        exact = (absmax <= levels) & (X == np.rint(X)).all(axis=1, keepdims=True)
+        scale[exact] = 1.0
+    scale[scale == 0] = 1.0
+
+    X /= scale
+    np.rint(X, out=X)
+
+    return X, scale
+
+
+class QuantizedOrdinalNN(FoldedOrdinalNN):
+    """Int8 dynamic quantization of the BatchNorm-folded network.
+
+    Weights are stored as int8 codes with one scale per output unit;
+    activations are quantized per row at run time (signed int8 for the
+    input, unsigned 8-bit after each ReLU). The integer products are run
+    through float32 BLAS: every partial sum stays below 2**24, so the
+    result is the exact int32 accumulation, rescaled once per layer.
+
+    An offline artifact about 4x smaller than the float32 one, not a
+    serving path: without int8 GEMM kernels it runs at roughly 0.4x the
+    float32 throughput (see benchmarks/quantized_model.py)."""
+
+    def __init__(self, layers: dict):
+
+        self.layers = []
+        for i in (1, 2, 3):
+            if f"q{i}" in layers:
+                codes, scale = np.asarray(layers[f"q{i}"], dtype=np.int8), np.asarray(layers[f"s{i}"], dtype=np.float32)
+            else:
+                codes, scale = quantize_weight(np.asarray(layers[f"w{i}"], dtype=np.float64))
+            self.layers.append((codes, scale, np.asarray(layers[f"b{i}"], dtype=np.float32)))
+
+        # integer codes as float32, transposed for X @ W
+        self._weights = [np.ascontiguousarray(codes.T, dtype=np.float32) for codes, _, _ in self.layers]
+
+        self.in_features = self.layers[0][0].shape[1]
+        self.out_features = self.layers[-1][0].shape[0]
+
+    @classmethod
+    def load(cls, path: Path):
+        """Loads a quantized .npz (no torch needed)"""
+
+        with np.load(path) as arrays:
+            return cls({key: arrays[key] for key in arrays.files})
+
+    def save(self, path: Path):
+
+        arrays = {}
+        for i, (codes, scale, bias) in enumerate(self.layers, start=1):
+            arrays.update({f"q{i}": codes, f"s{i}": scale, f"b{i}": bias})
+        np.savez(path, **arrays)
+
+    def __call__(self, X):
+        """Logits for a (n, 154) float32 batch"""
+
+        h = np.array(X, dtype=np.float32, ndmin=2)
+
+        for i, (weight, (_, w_scale, bias)) in enumerate(zip(self._weights, self.layers)):
+            # input may be negative; ReLU outputs use the full unsigned range
+            codes, x_scale = quantize_rows(h, 255 if i else 127, keep_integers=i == 0)
+            h = codes @ weight
+            h *= x_scale
+            h *= w_scale
+            h += bias
+            if i < len(self.layers) - 1:
+                np.maximum(h, 0.0, out=h)
+
+        return h
+
+
+def load_quantized_model(path: Path):
+    """Loader for a quantized .npz, or a .pth quantized on load"""
+
+    path = Path(path)
+    if path.suffix == ".npz":
+        return QuantizedOrdinalNN.load(path)
+
+    return QuantizedOrdinalNN.from_checkpoint(path)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Quantizes the folded ordinal network to int8")
+    parser.add_argument("checkpoint", type=Path, nargs="?", default=models_path / "best_ordinal_nn_model.pth")
+    parser.add_argument("-o", "--output", type=Path, default=models_path / "best_ordinal_nn_model.int8.npz")
+    args = parser.parse_args()
+
+    model = QuantizedOrdinalNN.from_checkpoint(args.checkpoint)
+    model.save(args.output)
+
+    print(f"Saved int8 model ({model.in_features} -> {model.out_features}) to {args.output}")
@@ -0,0 +1,226 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from ordinal_model import PowerfulOrdinalNN
+from train import NUM_CLASSES, Trainer, load_training_data, ordinal_targets, set_seed, set_threads
+
+app_path = Path(__file__).resolve().parent
+models_path = app_path.parent / "models"
+data_path = app_path.parent / "data"
+
+# name -> (kind, choices or bounds)
+SEARCH_SPACE = {
+    "hidden1": ("choice", [64, 128, 256, 512]),
+    "hidden2": ("choice", [32, 64, 128, 256]),
+    "dropout": ("uniform", [0.1, 0.5]),
+    "lr": ("log_uniform", [1e-4, 3e-3]),
+    "weight_decay": ("log_uniform", [1e-6, 1e-3]),
+    "batch_size": ("choice", [64, 128, 256, 512]),
+}
+
+
+def sample_configs(n_trials: int, seed: int = 42, space: dict = SEARCH_SPACE):
+    """Deterministic random configurations, so a resumed search
+    regenerates exactly the same trials"""
+
+    rng = np.random.default_rng(seed)
+    configs = []
+
+    for _ in range(n_trials):
+        config = {}
+        for name, (kind, values) in space.items():
+            if kind == "choice":
+                config[name] = values[int(rng.integers(len(values)))]
+            elif kind == "uniform":
+                config[name] = round(float(rng.uniform(*values)), 4)
+            else:
+                config[name] = float(f"{math.exp(rng.uniform(*np.log(values))):.3g}")
+        configs.append(config)
+
+    return configs
+
+
+def rung_budgets(min_epochs: int, max_epochs: int, eta: int):
+    """Epoch budgets min_epochs * eta^k, capped at max_epochs"""
+
+    budgets = [min_epochs]
+    while budgets[-1] < max_epochs:
+        budgets.append(min(budgets[-1] * eta, max_epochs))
+
+    return budgets
+
+
+class TrialStore:
+    """Append-only JSON-lines record of finished (trial, rung) runs"""
+
+    def __init__(self, directory: Path):
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / "trials.jsonl"
+        self.spec_path = self.directory / "search.json"
+
+    def checkpoint(self, trial: int):
+
+        return self.directory / f"trial_{trial:04d}.pt"
+
+    def check_spec(self, spec: dict):
+        """Refuses to resume a directory created with other settings"""
+
+        spec = json.loads(json.dumps(spec))
+        if self.spec_path.exists():
+            with open(self.spec_path, "r", encoding="utf-8") as file:
+                saved = json.load(file)
+            if saved != spec:
+                raise ValueError(f"{self.directory} holds a search with different settings: {saved}")
+        else:
+            with open(self.spec_path, "w", encoding="utf-8") as file:
+                json.dump(spec, file, indent=1)
+
+    def results(self):
+        """{(trial, rung): record}; a torn last line from a crash is ignored"""
+
+        results = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    results[(record["trial"], record["rung"])] = record
+
+        return results
+
+    def append(self, record: dict):
+
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+
+_DATA = None
+
+
+def _init_worker(data_file: Path, seed: int, threads: int):
+    """Loads the splits once per worker process"""
+
+    global _DATA
+    set_threads(threads)
+    data = load_training_data(data_file, seed)
+    _DATA = {
+        "train": (data["train"][0], ordinal_targets(data["train"][1])),
+        "val": (data["val"][0], ordinal_targets(data["val"][1])),
+    }
+
+
+def _run_trial(job):
+    """Trains one configuration up to `budget` epochs, continuing from its
+    checkpoint of the previous rung"""
+
+    trial, rung, config, budget, max_epochs, checkpoint, seed = job
+    started = time.perf_counter()
+
+    set_seed(seed + trial)
+    model = PowerfulOrdinalNN(_DATA["train"][0].shape[1], config["hidden1"], config["hidden2"],
+                              NUM_CLASSES - 1, config["dropout"])
+    trainer = Trainer(model, nn.BCEWithLogitsLoss(), lr=config["lr"], weight_decay=config["weight_decay"],
+                      batch_size=config["batch_size"], epochs=max_epochs, seed=seed + trial, log=None)
+
+    if rung > 0 and Path(checkpoint).exists():
+        trainer.load_state_dict(torch.load(checkpoint, weights_only=False))
+
+    result = trainer.fit(_DATA["train"], _DATA["val"], epochs=budget)
+    torch.save(trainer.state_dict(), checkpoint)
+
+    return {
+        "trial": trial, "rung": rung, "config": config, "epochs": result["epochs"],
+        "stopped": result["stopped"], "val_loss": result["best_val_loss"],
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def successive_halving(data_file: Path, directory: Path, n_trials: int = 27, min_epochs: int = 2,
+                       max_epochs: int = 18, eta: int = 3, workers: int = 2, threads: int = None,
+                       seed: int = 42, log=print):
+    """Runs every trial for min_epochs, keeps the best 1/eta for eta times
+    as many epochs, and so on up to max_epochs. Finished runs are read back
+    from the store, so an interrupted search resumes where it stopped"""
+
+    store = TrialStore(directory)
+    budgets = rung_budgets(min_epochs, max_epochs, eta)
+    store.check_spec({"data": str(data_file), "n_trials": n_trials, "budgets": budgets, "eta": eta,
+                      "seed": seed, "space": SEARCH_SPACE})
+
+    configs = sample_configs(n_trials, seed)
+    threads = threads or max(1, (os.cpu_count() or 2) // 2 // workers)
+    alive = list(range(n_trials))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(data_file, seed, threads)) as pool:
+        for rung, budget in enumerate(budgets):
+            done = store.results()
+            pending = [trial for trial in alive if (trial, rung) not in done]
+            log(f"rung {rung}: {len(alive)} trials x {budget} epochs ({len(alive) - len(pending)} already done)")
+
+            jobs = [(trial, rung, configs[trial], budget, max_epochs, str(store.checkpoint(trial)), seed)
+                    for trial in pending]
+            for future in as_completed([pool.submit(_run_trial, job) for job in jobs]):
+                record = future.result()
+                store.append(record)
+                log(f"  trial {record['trial']:>3}  val {record['val_loss']:.4f}  "
+                    f"{record['epochs']} epochs  {record['seconds']}s  {record['config']}")
+
+            done = store.results()
+            ranked = sorted(alive, key=lambda trial: done[(trial, rung)]["val_loss"])
+            if rung < len(budgets) - 1:
+                alive = ranked[:max(1, len(ranked) // eta)]
+                for trial in ranked[len(alive):]:
+                    store.checkpoint(trial).unlink(missing_ok=True)
+
+    best = done[(ranked[0], len(budgets) - 1)]
+
+    return best, store.checkpoint(best["trial"])
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Successive-halving search over PowerfulOrdinalNN configurations")
+    parser.add_argument("data", type=Path, nargs="?", default=data_path / "cleaned_data_dummies.csv")
+    parser.add_argument("-d", "--directory", type=Path, default=models_path / "search")
+    parser.add_argument("-n", "--trials", type=int, default=27)
+    parser.add_argument("--min-epochs", type=int, default=2)
+    parser.add_argument("--max-epochs", type=int, default=18)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("-w", "--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=None, help="intra-op threads per worker")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--export", type=Path, default=None,
+                        help="write the best weights to this .pth (and its configuration next to it)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    best, checkpoint = successive_halving(args.data, args.directory, args.trials, args.min_epochs,
+                                          args.max_epochs, args.eta, args.workers, args.threads, args.seed)
+
+    print(f"best trial {best['trial']} (val {best['val_loss']:.4f}) in {time.perf_counter() - started:.0f}s: "
+          f"{best['config']}")
+
+    if args.export:
+        torch.save(torch.load(checkpoint, weights_only=False)["best_state"], args.export)
+        with open(args.export.with_suffix(".json"), "w", encoding="utf-8") as file:
+            json.dump(best, file, indent=1)
+        print(f"best weights written to {args.export}")
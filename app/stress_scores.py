@@ -0,0 +1,175 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+from column_store import open_store
+from feature_schema import FeatureSchema, NUMERIC_FEATURES
+from file_lock import FileLock
+from folded_model import load_folded_model
+from model_registry import file_digest
+
+app_path = Path(__file__).resolve().parent
+models_path = app_path.parent / "models"
+data_path = app_path.parent / "data"
+
+# bumped whenever the decoding of model outputs changes; 2: ordinal
+# thresholds decoded into three levels instead of softmaxed as two
+SCORES_FORMAT = 2
+
+
+class StressScores:
+    """Predicted class and probabilities for every row of a cleaned
+    dataset, memory-mapped from one materialization directory"""
+
+    def __init__(self, path: Path):
+
+        self.path = Path(path)
+        # v<format>-<model hash>-<data hash>: changes whenever any of them does
+        self.key = self.path.name
+        with open(self.path / "manifest.json", "r", encoding="utf-8") as file:
+            self.manifest = json.load(file)
+
+        # -1 marks rows with a missing feature
+        self.classes = np.load(self.path / "predicted_class.npy", mmap_mode="r")
+        self.probs = np.load(self.path / "probabilities.npy", mmap_mode="r")
+        self.n_classes = self.probs.shape[1]
+
+    @property
+    def stress(self):
+        """Probability of any level above Low, NaN for unscored rows"""
+
+        return 1.0 - self.probs[:, 0]
+
+    def class_counts(self, groups: np.ndarray, n_groups: int, rows: np.ndarray = None):
+        """(n_groups, n_classes) predicted-class counts, over `rows` only when given"""
+
+        classes = np.asarray(self.classes)
+        groups = np.asarray(groups)
+        if rows is not None:
+            classes, groups = classes[rows], groups[rows]
+
+        scored = (classes >= 0) & (groups >= 0)
+        cells = groups[scored].astype(np.int64) * self.n_classes + classes[scored]
+
+        return np.bincount(cells, minlength=n_groups * self.n_classes).reshape(n_groups, self.n_classes)
+
+
+def score_store(store, model, schema: FeatureSchema, output: Path, chunk_rows: int = 65_536):
+    """Encodes and scores the store in chunks straight into .npy memory maps"""
+
+    df = store.load(["economy"] + NUMERIC_FEATURES)
+    n_rows = len(df)
+
+    # one probe row gives the number of probability columns
+    n_classes = model.predict(np.zeros((1, schema.n_features), dtype=np.float32))[1].shape[1]
+    classes = np.lib.format.open_memmap(output / "predicted_class.npy", mode="w+",
+                                        dtype=np.int8, shape=(n_rows,))
+    probs = np.lib.format.open_memmap(output / "probabilities.npy", mode="w+",
+                                      dtype=np.float32, shape=(n_rows, n_classes))
+
+    for start in range(0, n_rows, chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        X, valid = schema.encode_frame(chunk)
+
+        preds, chunk_probs = model.predict(X[valid])
+        stop = start + len(chunk)
+        classes[start:stop] = -1
+        classes[start:stop][valid] = preds
+        probs[start:stop] = np.nan
+        probs[start:stop][valid] = chunk_probs
+
+    classes.flush()
+    probs.flush()
+
+    return n_rows, int((classes >= 0).sum())
+
+
+def open_scores(source: Path = None, model_path: Path = None, loader=load_folded_model,
+                schema_path: Path = None, chunk_rows: int = 65_536, log=None):
+    """Scores for source under model_path, materialized on first use in
+    <source>_scores/v<format>-<model hash>-<data hash>; older materializations are
+    removed. Cheap once materialized: a hash of the checkpoint and a stat
+    of the data"""
+
+    source = Path(source or data_path / "cleaned_data.csv")
+    model_path = Path(model_path or models_path / "best_ordinal_nn_model.npz")
+
+    store = open_store(source)
+    key = f"v{SCORES_FORMAT}-{file_digest(model_path)[:12]}-{store.fingerprint()}"
+    root = source.with_name(f"{source.stem}_scores")
+    path = root / key
+
+    if (path / "manifest.json").exists():
+        return StressScores(path)
+
+    # one materialization at a time across server processes
+    with FileLock(root.with_name(f"{root.name}.lock")):
+        if (path / "manifest.json").exists():
+            return StressScores(path)
+        _materialize(store, source, model_path, loader, schema_path, chunk_rows, root, key, log)
+
+    return StressScores(path)
+
+
+def _materialize(store, source: Path, model_path: Path, loader, schema_path: Path,
+                 chunk_rows: int, root: Path, key: str, log=None):
+    """Builds root/key (lock held)"""
+
+    path = root / key
+    started = time.perf_counter()
+    building = root / f".{key}.{os.getpid()}.tmp"
+    shutil.rmtree(building, ignore_errors=True)
+    building.mkdir(parents=True)
+
+    schema = FeatureSchema.load(schema_path or models_path / "feature_schema.json")
+    rows, scored = score_store(store, loader(model_path), schema, building, chunk_rows)
+
+    manifest = {
+        "rows": rows,
+        "scored": scored,
+        "format": SCORES_FORMAT,
+        "model": {"path": model_path.name, "sha256": file_digest(model_path)},
+        "data": {"path": source.name, "fingerprint": store.fingerprint()},
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    with open(building / "manifest.json", "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=1)
+
+    # publish atomically; a target that already exists holds the same scores
+    try:
+        building.rename(path)
+    except OSError:
+        if not (path / "manifest.json").exists():
+            raise
+        shutil.rmtree(building, ignore_errors=True)
+
+    # drop materializations of other model/data versions and dead builds;
+    # maps other processes still hold on them stay valid
+    for other in root.iterdir():
+        if other != path and other.is_dir():
+            shutil.rmtree(other, ignore_errors=True)
+
+    if log:
+        log(f"Scored {scored:,} of {rows:,} rows in {manifest['seconds']}s into {path}")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Materializes PowerfulOrdinalNN predictions for the cleaned dataset")
+    parser.add_argument("source", type=Path, nargs="?", default=data_path / "cleaned_data.csv")
+    parser.add_argument("--model", type=Path, default=models_path / "best_ordinal_nn_model.npz")
+    parser.add_argument("--chunk-rows", type=int, default=65_536)
+    args = parser.parse_args()
+
+    scores = open_scores(args.source, args.model, chunk_rows=args.chunk_rows, log=print)
+    counts = np.bincount(np.asarray(scores.classes)[np.asarray(scores.classes) >= 0], minlength=scores.n_classes)
+
+    print(f"{scores.path}: predicted class counts {counts.tolist()}")
@@ -0,0 +1,338 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import argparse
+import json
+import os
+import random
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import torch
+import torch.nn as nn
+import torch.optim as optim
+
+from folded_model import FoldedOrdinalNN
+from ordinal_model import MulticlassNN, PowerfulOrdinalNN
+
+app_path = Path(__file__).resolve().parent
+models_path = app_path.parent / "models"
+data_path = app_path.parent / "data"
+
+# worry_level -> ordinal label, as in notebooks/model.ipynb
+WORRY_CODES = {"Baixo": 0, "Moderado": 1, "Alto": 2}
+NUM_CLASSES = 3
+
+
+def set_seed(seed: int):
+
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def set_threads(threads: int = None):
+    """Intra-op threads (physical cores by default) and a single inter-op
+    thread: the model is one sequential chain of small GEMMs"""
+
+    threads = threads or max(1, (os.cpu_count() or 2) // 2)
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # already fixed once any parallel work has run in this process
+        pass
+
+    return threads
+
+
+def load_training_data(path: Path = None, seed: int = 42):
+    """Splits of cleaned_data_dummies.csv the way the notebook made them:
+    80/20 train/test, then a stratified 80/20 train/validation split of the
+    training part. Features stay unscaled: FeatureSchema, BatchScorer and
+    the prediction service feed the raw encoding to every model"""
+
+    from sklearn.model_selection import train_test_split
+
+    df = pd.read_csv(path or data_path / "cleaned_data_dummies.csv", encoding="latin1")
+    y = df.pop("worry_level").map(WORRY_CODES).to_numpy(dtype=np.int64)
+    X = df.to_numpy(dtype=np.float32)
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=seed)
+
+    X_train, X_val, y_train, y_val = train_test_split(X_train, y_train, test_size=0.2,
+                                                      random_state=seed, stratify=y_train)
+
+    def tensors(X, y):
+        return torch.from_numpy(np.ascontiguousarray(X, dtype=np.float32)), torch.from_numpy(y)
+
+    return {
+        "train": tensors(X_train, y_train),
+        "val": tensors(X_val, y_val),
+        "test": tensors(X_test, y_test),
+        "columns": df.columns.tolist(),
+    }
+
+
+def ordinal_targets(y: torch.Tensor, num_thresholds: int = NUM_CLASSES - 1):
+    """Cumulative binary targets: column j is 1 when the level exceeds j"""
+
+    return (y[:, None] > torch.arange(num_thresholds)).float()
+
+
+class InMemoryBatches:
+    """Batches sliced from one permuted copy of the tensors per epoch,
+    instead of collating single rows in a DataLoader"""
+
+    def __init__(self, X: torch.Tensor, y: torch.Tensor, batch_size: int, shuffle: bool = False,
+                 generator: torch.Generator = None):
+
+        self.X, self.y = X, y
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.generator = generator
+
+    def __len__(self):
+
+        return -(-len(self.X) // self.batch_size)
+
+    def __iter__(self):
+
+        X, y = self.X, self.y
+        if self.shuffle:
+            order = torch.randperm(len(X), generator=self.generator)
+            X, y = X[order], y[order]
+
+        return zip(X.split(self.batch_size), y.split(self.batch_size))
+
+
+class Trainer:
+    """AdamW + ReduceLROnPlateau + early stopping on validation loss,
+    the loop of notebooks/model.ipynb without the per-row DataLoader"""
+
+    def __init__(self, model: nn.Module, criterion: nn.Module, lr: float = 1e-3, weight_decay: float = 1e-5,
+                 batch_size: int = 128, epochs: int = 50, patience: int = 5, bf16: bool = False,
+                 seed: int = 42, log=print):
+
+        self.model = model
+        self.criterion = criterion
+        self.optimizer = optim.AdamW(model.parameters(), lr=lr, weight_decay=weight_decay)
+        self.scheduler = optim.lr_scheduler.ReduceLROnPlateau(self.optimizer, mode="min", factor=0.1, patience=5)
+        self.batch_size = batch_size
+        self.epochs = epochs
+        self.patience = patience
+        self.bf16 = bf16
+        self.generator = torch.Generator().manual_seed(seed)
+        self.log = log or (lambda *args: None)
+
+        # progress, kept across fit() calls so a run can be extended
+        self.epoch = 0
+        self.best_loss = float("inf")
+        self.best_state = None
+        self.last_state = None
+        self.stale = 0
+        self.stopped = False
+        self.history = []
+
+    def state_dict(self):
+
+        return {
+            "model": self.last_state or self.model.state_dict(),
+            "optimizer": self.optimizer.state_dict(),
+            "scheduler": self.scheduler.state_dict(),
+            "generator": self.generator.get_state(),
+            # dropout draws from the global generator
+            "torch_rng": torch.get_rng_state(),
+            "progress": {"epoch": self.epoch, "best_loss": self.best_loss, "stale": self.stale,
+                         "stopped": self.stopped, "history": self.history},
+            "best_state": self.best_state,
+        }
+
+    def load_state_dict(self, state: dict):
+
+        self.last_state = state["model"]
+        self.model.load_state_dict(state["best_state"] or state["model"])
+        self.optimizer.load_state_dict(state["optimizer"])
+        self.scheduler.load_state_dict(state["scheduler"])
+        self.generator.set_state(state["generator"])
+        torch.set_rng_state(state["torch_rng"])
+        self.best_state = state["best_state"]
+        for key, value in state["progress"].items():
+            setattr(self, key, value)
+
+    def autocast(self):
+
+        return torch.autocast("cpu", dtype=torch.bfloat16) if self.bf16 else nullcontext()
+
+    def loss(self, X: torch.Tensor, y: torch.Tensor):
+
+        with self.autocast():
+            return self.criterion(self.model(X).float(), y)
+
+    def evaluate(self, X: torch.Tensor, y: torch.Tensor):
+        """Mean batch loss, as the notebook averaged it"""
+
+        self.model.eval()
+        losses = []
+        with torch.inference_mode():
+            for batch_x, batch_y in InMemoryBatches(X, y, self.batch_size):
+                losses.append(self.loss(batch_x, batch_y).item())
+
+        return float(np.mean(losses))
+
+    def run_epoch(self, batches: InMemoryBatches):
+
+        self.model.train()
+        total, n_batches = 0.0, 0
+
+        for batch_x, batch_y in batches:
+            self.optimizer.zero_grad(set_to_none=True)
+            loss = self.loss(batch_x, batch_y)
+            loss.backward()
+            self.optimizer.step()
+            total += loss.item()
+            n_batches += 1
+
+        return total / n_batches
+
+    def fit(self, train, val, save_path: Path = None, epochs: int = None):
+        """Trains up to `epochs` in total (self.epochs by default) or until
+        early stopping; calling it again with more epochs continues the run.
+        Leaves (and optionally saves) the weights with the best validation loss"""
+
+        batches = InMemoryBatches(*train, self.batch_size, shuffle=True, generator=self.generator)
+        target = min(epochs or self.epochs, self.epochs)
+
+        if self.last_state is not None:
+            # continue from the last weights, not the best ones left loaded
+            self.model.load_state_dict(self.last_state)
+
+        while self.epoch < target and not self.stopped:
+            self.epoch += 1
+            started = time.perf_counter()
+            train_loss = self.run_epoch(batches)
+            seconds = time.perf_counter() - started
+            val_loss = self.evaluate(*val)
+
+            lr = self.optimizer.param_groups[0]["lr"]
+            self.history.append({"epoch": self.epoch, "train_loss": train_loss, "val_loss": val_loss, "lr": lr,
+                                 "seconds": seconds, "samples_per_second": len(train[0]) / seconds})
+            self.log(f"epoch {self.epoch:>2}/{self.epochs}  train {train_loss:.4f}  val {val_loss:.4f}  "
+                     f"lr {lr:.0e}  {seconds:.2f}s  {len(train[0]) / seconds:,.0f} samples/s")
+
+            self.scheduler.step(val_loss)
+
+            if val_loss < self.best_loss:
+                self.best_loss, self.stale = val_loss, 0
+                self.best_state = {key: value.detach().clone() for key, value in self.model.state_dict().items()}
+                if save_path:
+                    torch.save(self.best_state, save_path)
+            else:
+                self.stale += 1
+
+            if self.stale >= self.patience:
+                self.stopped = True
+                self.log(f"early stop at epoch {self.epoch}, best val {self.best_loss:.4f}")
+
+        self.last_state = {key: value.detach().clone() for key, value in self.model.state_dict().items()}
+        self.model.load_state_dict(self.best_state)
+        self.model.eval()
+
+        return {"best_val_loss": self.best_loss, "epochs": self.epoch, "stopped": self.stopped,
+                "history": self.history}
+
+
+def ordinal_accuracy(model: nn.Module, X: torch.Tensor, y: torch.Tensor):
+    """Thresholded cumulative logits -> level, as in the notebook's test cell"""
+
+    with torch.inference_mode():
+        levels = (torch.sigmoid(model(X)) > 0.5).sum(dim=1)
+
+    return float((levels == y).float().mean())
+
+
+def multiclass_accuracy(model: nn.Module, X: torch.Tensor, y: torch.Tensor):
+
+    with torch.inference_mode():
+        return float((model(X).argmax(dim=1) == y).float().mean())
+
+
+def train_ordinal(data: dict, hidden1: int = 128, hidden2: int = 64, dropout: float = 0.4,
+                  save_path: Path = None, **trainer_kwargs):
+
+    X_train, y_train = data["train"]
+    model = PowerfulOrdinalNN(X_train.shape[1], hidden1, hidden2, NUM_CLASSES - 1, dropout)
+    trainer = Trainer(model, nn.BCEWithLogitsLoss(), **trainer_kwargs)
+
+    result = trainer.fit((X_train, ordinal_targets(y_train)),
+                         (data["val"][0], ordinal_targets(data["val"][1])), save_path)
+    result["test_accuracy"] = ordinal_accuracy(model, *data["test"])
+
+    return model, result
+
+
+def train_multiclass(data: dict, hidden1: int = 128, hidden2: int = 64, dropout: float = 0.4,
+                     save_path: Path = None, **trainer_kwargs):
+
+    X_train, y_train = data["train"]
+
+    # "balanced" class weights: n / (classes * count)
+    counts = torch.bincount(y_train, minlength=NUM_CLASSES).float()
+    weights = len(y_train) / (NUM_CLASSES * counts)
+
+    model = MulticlassNN(X_train.shape[1], hidden1, hidden2, NUM_CLASSES, dropout)
+    trainer = Trainer(model, nn.CrossEntropyLoss(weight=weights), **trainer_kwargs)
+
+    result = trainer.fit(data["train"], data["val"], save_path)
+    result["test_accuracy"] = multiclass_accuracy(model, *data["test"])
+
+    return model, result
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Trains PowerfulOrdinalNN and MulticlassNN on CPU")
+    parser.add_argument("data", type=Path, nargs="?", default=data_path / "cleaned_data_dummies.csv")
+    parser.add_argument("--model", choices=["ordinal", "multiclass", "both"], default="both")
+    parser.add_argument("-o", "--output-dir", type=Path, default=models_path)
+    parser.add_argument("--epochs", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--bf16", action="store_true", help="bfloat16 autocast (CPUs with AVX512-BF16/AMX)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    set_seed(args.seed)
+    threads = set_threads(args.threads)
+
+    started = time.perf_counter()
+    data = load_training_data(args.data, args.seed)
+    print(f"{len(data['train'][0]):,} train / {len(data['val'][0]):,} val / {len(data['test'][0]):,} test rows "
+          f"loaded in {time.perf_counter() - started:.1f}s, {threads} threads")
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    trainer_kwargs = {"lr": args.lr, "batch_size": args.batch_size, "epochs": args.epochs,
+                      "bf16": args.bf16, "seed": args.seed}
+    jobs = {
+        "ordinal": (train_ordinal, "best_ordinal_nn_model.pth"),
+        "multiclass": (train_multiclass, "best_multiclass_nn_model.pth"),
+    }
+
+    for name, (train, filename) in jobs.items():
+        if args.model not in (name, "both"):
+            continue
+        print(f"--- {name}")
+        set_seed(args.seed)
+        _, result = train(data, save_path=args.output_dir / filename, **trainer_kwargs)
+        history = result.pop("history")
+        result["samples_per_second"] = round(float(np.median([h["samples_per_second"] for h in history])), 1)
+        print(json.dumps(result))
+
+        if name == "ordinal":
+            # the torch-free artifact the app serves
+            checkpoint = args.output_dir / filename
+            FoldedOrdinalNN.from_checkpoint(checkpoint).save(checkpoint.with_suffix(".npz"), source=checkpoint)
@@ -0,0 +1,79 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+import time
+
+import numpy as np
+
+from feature_schema import NUMERIC_FEATURES
+
+# the Simulator checkboxes, in form order
+FLAG_LABELS = {
+    "emp_in": "In the labor market",
+    "account": "Financial account",
+    "borrowed": "Borrowed money",
+    "saved": "Saved money",
+    "receive_wages": "Received wages",
+    "receive_transfers": "Government transfers",
+    "receive_pension": "Government pension",
+    "pay_utilities": "Paid utilities via account",
+    "anydigpayment": "Digital payments",
+    "mobileowner": "Owns a mobile phone",
+    "internetaccess": "Internet access",
+    "debit_card": "Debit card",
+    "credit_card": "Credit card",
+    "paid_balance_regularly": "Paid card balance in full",
+}
+
+AGES = np.arange(0, 101)
+INCOME_QUANTILES = np.arange(1, 6)
+
+_FLAG_COLUMNS = np.array([NUMERIC_FEATURES.index(name) for name in FLAG_LABELS])
+_AGE_COLUMN = NUMERIC_FEATURES.index("age")
+_INCOME_COLUMN = NUMERIC_FEATURES.index("inc_q")
+
+
+def sensitivity_variants(x: np.ndarray):
+    """The submitted row, then one copy per flipped checkbox, per age and
+    per income quantile, as one (121, n_features) float32 matrix"""
+
+    x = np.asarray(x, dtype=np.float32).ravel()
+    n_flags, n_ages = len(_FLAG_COLUMNS), len(AGES)
+    X = np.tile(x, (1 + n_flags + n_ages + len(INCOME_QUANTILES), 1))
+
+    flips = np.arange(1, 1 + n_flags)
+    X[flips, _FLAG_COLUMNS] = 1.0 - X[flips, _FLAG_COLUMNS]
+
+    start = 1 + n_flags
+    X[start:start + n_ages, _AGE_COLUMN] = AGES
+    X[start + n_ages:, _INCOME_COLUMN] = INCOME_QUANTILES
+
+    return X
+
+
+def sensitivity_sweep(model, x: np.ndarray):
+    """Scores every variant of x in one model.predict call. The stress
+    probability is the chance of any level above Low (1 - P(class 0))"""
+
+    X = sensitivity_variants(x)
+    started = time.perf_counter()
+    _, probs = model.predict(X)
+    seconds = time.perf_counter() - started
+
+    stress = 1.0 - probs[:, 0]
+    base = float(stress[0])
+    n_flags, n_ages = len(_FLAG_COLUMNS), len(AGES)
+    ages = stress[1 + n_flags:1 + n_flags + n_ages]
+    incomes = stress[1 + n_flags + n_ages:]
+
+    return {
+        "base": base,
+        "flags": {
+            FLAG_LABELS[name]: {"on": bool(x.ravel()[col] == 0), "delta": float(stress[i] - base)}
+            for i, (name, col) in enumerate(zip(FLAG_LABELS, _FLAG_COLUMNS), start=1)
+        },
+        "age": dict(zip(AGES.tolist(), ages.tolist())),
+        "inc_q": dict(zip(INCOME_QUANTILES.tolist(), incomes.tolist())),
+        "variants": len(X),
+        "seconds": seconds,
+    }
@@ -0,0 +1,141 @@
+# -*- coding: UTF-8 -*-
+"""Import Modules"""
+
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+# the 0/1 filters of the Information Dashboard
+CUBE_FLAGS = ["female", "emp_in", "saved", "account", "credit_card", "mobileowner"]
+
+
+class WorryCube:
+    """Histograms of financial_worry per (economy, flags) cell and age,
+    so filtered medians come from merging counts instead of scanning rows.
+
+    Each flag is stored as 0, 1 or 2 for a missing (or any other) value.
+    A filtered flag only selects its 0/1 cells, dropping those rows as
+    `df[flag] == value` did; an unfiltered flag keeps all three"""
+
+    def __init__(self, df: pd.DataFrame, flags=CUBE_FLAGS, value_col: str = "financial_worry",
+                 max_values: int = 4096):
+
+        df = df[df[value_col].notna()]
+
+        self.flags = list(flags)
+        economy = pd.Categorical(df["economy"])
+        self.countries = list(economy.categories)
+        self.ages, age_idx = np.unique(df["age"].to_numpy(), return_inverse=True)
+        self.values, value_idx = np.unique(df[value_col].to_numpy(), return_inverse=True)
+
+        if len(self.values) > max_values:
+            raise ValueError(f"{value_col} has {len(self.values)} distinct values, too many for a histogram cube")
+
+        flag_code = np.zeros(len(df), dtype=np.int64)
+        # the states each flag takes in the data, so clean flags enumerate two
+        self.states = []
+        for digit, flag in enumerate(self.flags):
+            column = df[flag].to_numpy(dtype=np.float64, na_value=np.nan)
+            state = np.where(column == 0, 0, np.where(column == 1, 1, 2))
+            self.states.append((0, 1, 2) if (state == 2).any() else (0, 1))
+            flag_code += state * 3 ** digit
+
+        self.n_codes = 3 ** len(self.flags)
+        self.n_cells = len(self.ages) * len(self.values)
+        self.all_countries = len(self.countries)
+
+        # one layer per economy plus a pre-merged "all economies" layer
+        cell = age_idx.astype(np.int64) * len(self.values) + value_idx
+        key = economy.codes.astype(np.int64) * self.n_codes + flag_code
+        keys = np.concatenate([key, self.all_countries * self.n_codes + flag_code])
+        cells = np.concatenate([cell, cell])
+
+        entries, self.counts = np.unique(keys * self.n_cells + cells, return_counts=True)
+        entry_keys = entries // self.n_cells
+        self.cells = entries % self.n_cells
+        self.offsets = np.searchsorted(entry_keys, np.arange((self.all_countries + 1) * self.n_codes + 1))
+
+    def _codes(self, flags: dict):
+        """Flag codes allowed by {flag: allowed 0/1 values}"""
+
+        flags = flags or {}
+        choices = [sorted({int(v) for v in flags[flag]} & {0, 1}) if flag in flags else states
+                   for flag, states in zip(self.flags, self.states)]
+
+        return [sum(value * 3 ** digit for digit, value in enumerate(combo)) for combo in product(*choices)]
+
+    def _layers(self, countries):
+
+        if countries is None:
+            return np.array([self.all_countries])
+
+        index = {name: i for i, name in enumerate(self.countries)}
+
+        return np.array([index[name] for name in countries if name in index], dtype=np.int64)
+
+    def _gather(self, layers, flags: dict):
+        """Cells, counts and layer of every entry in the selected keys"""
+
+        codes = np.array(self._codes(flags), dtype=np.int64)
+        keys = (layers[:, None] * self.n_codes + codes[None, :]).ravel()
+        starts, lengths = self.offsets[keys], self.offsets[keys + 1] - self.offsets[keys]
+
+        # ragged gather of the [start, start + length) slices
+        total = int(lengths.sum())
+        shifts = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        positions = shifts + np.arange(total)
+
+        return self.cells[positions], self.counts[positions], np.repeat(keys // self.n_codes, lengths)
+
+    def histogram(self, countries=None, flags: dict = None):
+        """(ages x values) counts for the selected cells"""
+
+        cells, counts, _ = self._gather(self._layers(countries), flags)
+        hist = np.bincount(cells, weights=counts, minlength=self.n_cells)
+
+        return hist.reshape(len(self.ages), len(self.values))
+
+    def median_by_age(self, countries=None, flags: dict = None, age_mask=None):
+        """Exact median of the value per age, same result as
+        groupby("age").median() over the filtered rows"""
+
+        hist = self.histogram(countries, flags)
+        if age_mask is not None:
+            hist = hist[age_mask]
+        ages = self.ages if age_mask is None else self.ages[age_mask]
+
+        present, median = self._medians(hist)
+
+        return pd.DataFrame({"age": ages[present], "financial_worry": median})
+
+    def median_by_country(self, countries=None, flags: dict = None, age_mask=None):
+        """Exact median of the value per economy under the filters"""
+
+        layers = np.arange(self.all_countries) if countries is None else self._layers(countries)
+        cells, counts, layer_ids = self._gather(layers, flags)
+        n_values = len(self.values)
+
+        if age_mask is not None:
+            keep = np.asarray(age_mask)[cells // n_values]
+            cells, counts, layer_ids = cells[keep], counts[keep], layer_ids[keep]
+
+        hist = np.bincount(layer_ids * n_values + cells % n_values, weights=counts,
+                           minlength=self.all_countries * n_values).reshape(self.all_countries, n_values)
+        present, median = self._medians(hist)
+
+        return {self.countries[i]: float(value) for i, value in zip(np.flatnonzero(present), median)}
+
+    def _medians(self, hist):
+        """Row-wise medians of a (groups x values) count matrix;
+        returns the mask of non-empty rows and their medians"""
+
+        n = hist.sum(axis=1)
+        present = n > 0
+        hist, n = hist[present], n[present]
+
+        cumulative = hist.cumsum(axis=1)
+        lower = (cumulative > ((n - 1) // 2)[:, None]).argmax(axis=1)
+        upper = (cumulative > (n // 2)[:, None]).argmax(axis=1)
+
+        return present, (self.values[lower] + self.values[upper]) / 2
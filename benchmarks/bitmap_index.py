@@ -0,0 +1,66 @@
+# -*- coding: UTF-8 -*-
+"""Bitmap index against the chained isin/== masks of info_dashboard,
+at 1x and 10x the survey size"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from common import cleaned_data, timeit
+
+from bitmap_index import BitmapIndex
+
+BINS = [0, 20, 40, 60, 80]
+LABELS = ["0-20", "20-40", "40-60", "60-80", ">80"]
+# the checkbox flags; sex is filtered separately through `sexes`
+FLAGS = {"emp_in": 1, "saved": 1, "account": 1, "credit_card": 1, "mobileowner": 1}
+
+
+def mask_chain(df, ages_cut, ages, sexes, countries):
+    """The filter chain the dashboard used to run on every rerun"""
+
+    df_filtered = df[ages_cut.isin(ages) & df["female"].isin(sexes) & df["economy"].isin(countries)]
+    mask = np.ones(len(df_filtered), dtype=bool)
+    for flag, value in FLAGS.items():
+        mask &= (df_filtered[flag] == value).to_numpy()
+
+    return df_filtered[mask]
+
+
+def bitmap_select(index, ages, sexes, countries):
+
+    return index.select(ages_cut=ages, female=sexes, economy=countries,
+                        **{flag: [value] for flag, value in FLAGS.items()})
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    for scale in (1, 10):
+        df = cleaned_data(scale)
+        ages_cut = pd.cut(df["age"], bins=BINS + [df["age"].max()], labels=LABELS, include_lowest=True)
+        countries = list(pd.Categorical(df["economy"]).categories)
+
+        columns = {col: df[col] for col in ["economy", "female", *FLAGS]}
+        columns["ages_cut"] = ages_cut
+        t_build = timeit(BitmapIndex, columns, repeat=3, warmup=0)
+        index = BitmapIndex(columns)
+
+        cases = {
+            "all countries": (LABELS, [0, 1], countries),
+            "one country": (["20-40"], [1], countries[:1]),
+        }
+        print(f"scale x{scale} ({len(df):,} rows), index build {t_build['median_ms']:.1f} ms")
+
+        for name, (ages, sexes, selected) in cases.items():
+            expected = mask_chain(df, ages_cut, ages, sexes, selected).index.to_numpy()
+            assert np.array_equal(bitmap_select(index, ages, sexes, selected), expected)
+
+            t_mask = timeit(mask_chain, df, ages_cut, ages, sexes, selected, repeat=args.repeat)
+            t_bits = timeit(bitmap_select, index, ages, sexes, selected, repeat=args.repeat)
+            print(f"  {name:<14} masks {t_mask['median_ms']:8.3f} ms | "
+                  f"bitmaps {t_bits['median_ms']:8.3f} ms | x{t_mask['median_ms'] / t_bits['median_ms']:.1f}")
@@ -0,0 +1,58 @@
+# -*- coding: UTF-8 -*-
+"""Box plot payload: raw per-group value lists (ECharts transform in the
+browser) against server-side summaries, for the whole sample and one country.
+
+Browser render time is not measured here; it grows with the number of values
+the transform has to sort, which is reported as `values shipped`"""
+
+import argparse
+import json
+
+import numpy as np
+
+from common import cleaned_data, timeit
+
+from chart_data import boxplot_summary
+
+
+def legacy_payload(df, var):
+    """The dataset source Graphs.boxplot used to send"""
+
+    source = [group["financial_worry"].tolist() for _, group in df.groupby(var, observed=True)]
+
+    return json.dumps({"dataset": [{"source": source}]}, separators=(",", ":"))
+
+
+def summary_payload(df, var):
+
+    names, boxes, outliers = boxplot_summary(df, var)
+
+    return json.dumps({"xAxis": {"data": [str(name) for name in names]},
+                       "series": [{"data": boxes}, {"data": outliers}]}, separators=(",", ":"))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--var", default="inc_q")
+    args = parser.parse_args()
+
+    for scale in (1, 10):
+        df = cleaned_data(scale)
+        first_country = df["economy"].to_numpy()[0]
+        cases = {
+            "all countries": df[[args.var, "financial_worry"]].dropna(),
+            "one country": df.loc[df["economy"] == first_country, [args.var, "financial_worry"]].dropna(),
+        }
+        print(f"scale x{scale} ({len(df):,} rows), grouped by {args.var}")
+
+        for name, subset in cases.items():
+            before, after = legacy_payload(subset, args.var), summary_payload(subset, args.var)
+            _, boxes, outliers = boxplot_summary(subset, args.var)
+
+            t_before = timeit(legacy_payload, subset, args.var, repeat=args.repeat)
+            t_after = timeit(summary_payload, subset, args.var, repeat=args.repeat)
+            print(f"  {name:<14} raw {len(before) / 1024:10.1f} KiB, {len(subset):>9,} values shipped, "
+                  f"{t_before['median_ms']:8.2f} ms | summary {len(after) / 1024:6.1f} KiB, "
+                  f"{np.size(boxes) + len(outliers):>4} values shipped, {t_after['median_ms']:6.2f} ms")
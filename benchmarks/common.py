@@ -0,0 +1,98 @@
+# -*- coding: UTF-8 -*-
+"""Shared helpers for the benchmark scripts"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+root_path = Path(__file__).resolve().parent.parent
+app_path = root_path / "app"
+models_path = root_path / "models"
+data_path = root_path / "data"
+
+# the app modules import each other by bare name (streamlit runs from app/)
+if str(app_path) not in sys.path:
+    sys.path.insert(0, str(app_path))
+
+
+def timeit(func, *args, repeat: int = 200, warmup: int = 5):
+    """Median and p99 wall time of func(*args), in milliseconds"""
+
+    for _ in range(warmup):
+        func(*args)
+
+    times = np.empty(repeat)
+    for i in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        times[i] = time.perf_counter() - started
+
+    return {
+        "median_ms": round(float(np.median(times)) * 1e3, 4),
+        "p99_ms": round(float(np.percentile(times, 99)) * 1e3, 4),
+    }
+
+
+def synthetic_features(n_rows: int, seed: int = 42, n_features: int = 154, n_numeric: int = 17):
+    """Random rows shaped like Simulator submissions"""
+
+    rng = np.random.default_rng(seed)
+    X = np.zeros((n_rows, n_features), dtype=np.float32)
+
+    X[:, :n_numeric] = rng.integers(0, 2, size=(n_rows, n_numeric))
+    X[:, 1] = rng.integers(15, 100, size=n_rows)
+    X[:, 2] = rng.integers(1, 6, size=n_rows)
+    X[:, 16] = rng.choice([-1, 0, 1], size=n_rows)
+
+    countries = rng.integers(n_numeric - 1, n_features, size=n_rows)
+    hot = countries >= n_numeric
+    X[np.flatnonzero(hot), countries[hot]] = 1.0
+
+    return X
+
+
+def synthetic_cleaned(n_rows: int = 128_000, seed: int = 42, n_countries: int = 138):
+    """Random frame with the columns and value ranges of cleaned_data.csv"""
+
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    flags = ["female", "emp_in", "account", "borrowed", "saved", "receive_wages",
+             "receive_transfers", "receive_pension", "pay_utilities", "anydigpayment",
+             "mobileowner", "internetaccess", "debit_card", "credit_card"]
+
+    df = pd.DataFrame({
+        "economy": pd.Categorical.from_codes(rng.integers(0, n_countries, n_rows),
+                                             [f"Country {i:03d}" for i in range(n_countries)]),
+        "age": rng.integers(15, 100, n_rows).astype(np.int8),
+        "inc_q": rng.integers(1, 6, n_rows).astype(np.int8),
+    })
+    for flag in flags:
+        df[flag] = rng.integers(0, 2, n_rows).astype(np.int8)
+    df["paid_balance_regularly"] = rng.choice(np.array([-1, 0, 1], dtype=np.int8), n_rows)
+
+    items = rng.choice([0, 1, 3], size=(n_rows, 4))
+    df["financial_worry"] = items @ np.array([0.21, 0.43, 0.175, 0.173])
+
+    return df
+
+
+def cleaned_data(scale: int = 1, seed: int = 42):
+    """cleaned_data.csv tiled `scale` times, or a synthetic stand-in
+    of the same size when the data file is not available"""
+
+    import pandas as pd
+
+    path = data_path / "cleaned_data.csv"
+    if not path.exists():
+        return synthetic_cleaned(128_000 * scale, seed)
+
+    from column_store import open_store
+
+    df = open_store(path).load()
+    if scale == 1:
+        return df
+
+    return pd.concat([df] * scale, ignore_index=True)
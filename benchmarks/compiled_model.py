@@ -0,0 +1,103 @@
+# -*- coding: UTF-8 -*-
+"""Cold load and per-batch predict latency: the frozen TorchScript artifact
+against torch.load + load_state_dict into PowerfulOrdinalNN and against
+the folded NumPy model the app serves. Each cold load runs in a fresh
+interpreter, so it includes the imports and the first call"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+import numpy as np
+import torch
+
+from common import app_path, models_path, synthetic_features, timeit
+
+from compiled_model import load_compiled_model
+from folded_model import decode_ordinal, load_folded_model
+from ordinal_model import load_ordinal_model
+
+COLD_LOAD = """
+import json, sys, time, warnings
+warnings.simplefilter("ignore")
+started = time.perf_counter()
+import numpy as np
+sys.path.insert(0, {app!r})
+from {module} import {loader} as load
+imported = time.perf_counter()
+model = load({path!r})
+loaded = time.perf_counter()
+x = np.zeros((1, 154), dtype=np.float32)
+for _ in range(2):
+    if hasattr(model, "predict"):
+        model.predict(x)
+    else:
+        import torch
+        with torch.inference_mode():
+            model(torch.from_numpy(x))
+first = time.perf_counter()
+print(json.dumps({{"import": imported - started, "load": loaded - imported, "first_calls": first - loaded}}))
+"""
+
+
+def cold_load(module: str, loader: str, path, runs: int):
+    """Median phase timings (ms) over fresh interpreters"""
+
+    code = COLD_LOAD.format(app=str(app_path), module=module, loader=loader, path=str(path))
+    samples = [json.loads(subprocess.run([sys.executable, "-c", code], capture_output=True,
+                                         text=True, check=True).stdout) for _ in range(runs)]
+
+    return {phase: round(float(np.median([s[phase] for s in samples])) * 1e3, 2) for phase in samples[0]}
+
+
+def forward(model, X):
+
+    with torch.inference_mode():
+        return model(X)
+
+
+def predict(model, X):
+    """predict() as the app calls it; the eager network has none, so it
+    gets the ordinal decoding CompiledModel.predict applies"""
+
+    if hasattr(model, "predict"):
+        return model.predict(X)
+
+    with torch.inference_mode():
+        return decode_ordinal(model(torch.from_numpy(X)).numpy())
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkpoint", default=models_path / "best_ordinal_nn_model.pth")
+    parser.add_argument("--compiled", default=models_path / "best_ordinal_nn_model.ts")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per cold load")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    print("cold load (ms)       import    load  first 2 calls")
+    for name, module, loader, path in (("state dict", "ordinal_model", "load_ordinal_model", args.checkpoint),
+                                       ("TorchScript", "compiled_model", "load_compiled_model", args.compiled),
+                                       ("folded NumPy", "folded_model", "load_folded_model", args.checkpoint)):
+        t = cold_load(module, loader, path, args.runs)
+        print(f"  {name:<16} {t['import']:>8.1f} {t['load']:>7.1f} {t['first_calls']:>14.2f}")
+
+    eager = load_ordinal_model(args.checkpoint)
+    compiled = load_compiled_model(args.compiled)
+    folded = load_folded_model(args.checkpoint)
+
+    X = synthetic_features(4096)
+    max_diff = float((forward(eager, torch.from_numpy(X)) - forward(compiled, torch.from_numpy(X))).abs().max())
+    print(f"max |logit diff| = {max_diff:.2e} over {len(X)} rows")
+
+    # predict() end to end, numpy in and out, as the app calls it
+    for n_rows in (1, 64, 4096):
+        batch = X[:n_rows]
+        repeat = args.repeat if n_rows < 4096 else max(args.repeat // 10, 10)
+        t_eager = timeit(predict, eager, batch, repeat=repeat)["median_ms"]
+        t_compiled = timeit(predict, compiled, batch, repeat=repeat)["median_ms"]
+        t_folded = timeit(predict, folded, batch, repeat=repeat)["median_ms"]
+        print(f"batch {n_rows:>5}: state dict {t_eager:.4f} ms | TorchScript {t_compiled:.4f} ms | "
+              f"folded NumPy {t_folded:.4f} ms")
@@ -0,0 +1,50 @@
+# -*- coding: UTF-8 -*-
+"""Per-economy sufficient statistics against a full DataFrame.corr()
+rescan, at 1x and 10x the survey size"""
+
+import argparse
+
+import numpy as np
+
+from common import cleaned_data, timeit
+
+from corr_stats import CorrelationStats
+
+
+def rescan(df, countries):
+    """What make_corr_matrix would cost if it followed the filters by rescanning"""
+
+    subset = df if countries is None else df[df["economy"].isin(countries)]
+
+    return subset.select_dtypes(include="number").corr()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for scale in (1, 10):
+        df = cleaned_data(scale)
+        t_build = timeit(CorrelationStats, df, repeat=3, warmup=0)
+        stats = CorrelationStats(df)
+
+        cases = {
+            "all countries": None,
+            "ten countries": stats.groups[:10],
+            "one country": stats.groups[:1],
+        }
+        print(f"scale x{scale} ({len(df):,} rows), accumulators build {t_build['median_ms']:.1f} ms")
+
+        for name, countries in cases.items():
+            expected = rescan(df, countries)
+            result = stats.corr(countries)
+            error = np.nanmax(np.abs(result.to_numpy() - expected.loc[result.index, result.columns].to_numpy()))
+            assert error < 1e-9, error
+
+            t_scan = timeit(rescan, df, countries, repeat=args.repeat)
+            t_stats = timeit(stats.corr, countries, repeat=args.repeat)
+            print(f"  {name:<14} rescan {t_scan['median_ms']:8.3f} ms | "
+                  f"accumulators {t_stats['median_ms']:8.3f} ms | x{t_scan['median_ms'] / t_stats['median_ms']:.1f} "
+                  f"| max error {error:.1e}")
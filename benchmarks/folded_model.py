@@ -0,0 +1,60 @@
+# -*- coding: UTF-8 -*-
+"""Equivalence check and latency comparison: torch PowerfulOrdinalNN
+against the BatchNorm-folded NumPy forward pass"""
+
+import argparse
+
+import numpy as np
+import torch
+
+from common import models_path, synthetic_features, timeit
+
+from folded_model import FoldedOrdinalNN, decode_ordinal
+from ordinal_model import load_ordinal_model
+
+
+def check_equivalence(torch_model, folded, X, atol: float = 1e-4):
+
+    with torch.inference_mode():
+        expected = torch_model(torch.from_numpy(X)).numpy()
+    expected_levels, expected_probs = decode_ordinal(expected)
+
+    logits = folded(X)
+    levels, probs = folded.predict(X)
+
+    max_diff = float(np.abs(logits - expected).max())
+    assert np.allclose(logits, expected, atol=atol), f"logits differ by {max_diff}"
+    assert np.allclose(probs, expected_probs, atol=atol)
+    assert (levels == expected_levels).mean() > 0.999
+
+    return max_diff
+
+
+def torch_forward(model, X):
+
+    with torch.inference_mode():
+        return torch.sigmoid(model(torch.from_numpy(X))).numpy()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkpoint", default=models_path / "best_ordinal_nn_model.pth")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    torch_model = load_ordinal_model(args.checkpoint)
+    folded = FoldedOrdinalNN.from_checkpoint(args.checkpoint)
+
+    X = synthetic_features(4096)
+    max_diff = check_equivalence(torch_model, folded, X)
+    print(f"equivalent: max |logit diff| = {max_diff:.2e} over {len(X)} rows")
+
+    for n_rows in (1, 64, 4096):
+        batch = X[:n_rows]
+        repeat = args.repeat if n_rows < 4096 else max(args.repeat // 10, 10)
+        t_torch = timeit(torch_forward, torch_model, batch, repeat=repeat)
+        t_numpy = timeit(folded.predict_proba, batch, repeat=repeat)
+        print(f"batch {n_rows:>5}: torch {t_torch['median_ms']:.4f} ms | "
+              f"numpy {t_numpy['median_ms']:.4f} ms | "
+              f"speedup x{t_torch['median_ms'] / t_numpy['median_ms']:.1f}")
@@ -0,0 +1,80 @@
+# -*- coding: UTF-8 -*-
+"""Latency of the NumPy logistic scorer next to PowerfulOrdinalNN (torch
+and folded NumPy), their class agreement, and accuracy on labelled data"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import torch
+
+from common import data_path, models_path, synthetic_features, timeit
+
+from folded_model import FoldedOrdinalNN
+from logistic_model import CLASS_IDS, LogisticScorer
+from ordinal_model import load_ordinal_model
+
+
+def check_pickle(scorer, path: Path, X, atol: float = 1e-5):
+    """Probabilities against sklearn's own predict_proba, when installed"""
+
+    try:
+        import pickle
+        with open(path, "rb") as file:
+            estimator = pickle.load(file)
+    except ImportError:
+        return None
+
+    order = [list(estimator.classes_).index(label) for label in CLASS_IDS]
+    expected = estimator.predict_proba(pd.DataFrame(X, columns=estimator.feature_names_in_))[:, order]
+    max_diff = float(np.abs(scorer.predict_proba(X) - expected).max())
+    assert max_diff < atol, f"probabilities differ by {max_diff}"
+
+    return max_diff
+
+
+def torch_forward(model, X):
+
+    with torch.inference_mode():
+        return (torch.sigmoid(model(torch.from_numpy(X))) > 0.5).sum(dim=1).numpy()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logistic", type=Path, default=models_path / "basic_logistic_regression.json")
+    parser.add_argument("--checkpoint", type=Path, default=models_path / "best_ordinal_nn_model.pth")
+    parser.add_argument("--data", type=Path, default=data_path / "cleaned_data_dummies.csv",
+                        help="labelled features for accuracy, skipped when missing")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    scorer = LogisticScorer.load(args.logistic)
+    torch_model = load_ordinal_model(args.checkpoint)
+    folded = FoldedOrdinalNN.from_checkpoint(args.checkpoint)
+
+    X = synthetic_features(4096)
+    max_diff = check_pickle(scorer, args.logistic.with_suffix(".pkl"), X)
+    if max_diff is not None:
+        print(f"matches sklearn: max |proba diff| = {max_diff:.2e} over {len(X)} rows")
+
+    agreement = (scorer.predict(X)[0] == folded.predict(X)[0]).mean()
+    print(f"class agreement with the ordinal net on synthetic rows: {agreement:.1%}")
+
+    if args.data.exists():
+        df = pd.read_csv(args.data, encoding="latin1")
+        y = df.pop("worry_level").map(CLASS_IDS).to_numpy()
+        X_data = df[scorer.feature_names].to_numpy(dtype=np.float32)
+        print(f"accuracy on {len(y):,} rows: logistic {(scorer.predict(X_data)[0] == y).mean():.4f} | "
+              f"ordinal net {(folded.predict(X_data)[0] == y).mean():.4f}")
+
+    print(f"{'batch':>7}  {'torch NN':>12}  {'folded NN':>12}  {'logistic':>12}")
+    for n_rows in (1, 64, 4096):
+        batch = X[:n_rows]
+        repeat = args.repeat if n_rows < 4096 else max(args.repeat // 10, 10)
+        times = [timeit(func, *func_args, repeat=repeat)["median_ms"]
+                 for func, func_args in ((torch_forward, (torch_model, batch)),
+                                         (folded.predict, (batch,)),
+                                         (scorer.predict, (batch,)))]
+        print(f"{n_rows:>7}  " + "  ".join(f"{t:>9.4f} ms" for t in times))
@@ -0,0 +1,78 @@
+# -*- coding: UTF-8 -*-
+"""Hit rate of the Simulator prediction cache on a stream of form
+submissions clustered around the defaults, for several entry limits,
+and the latency of a hit against a forward pass"""
+
+import argparse
+
+import numpy as np
+
+from common import models_path, timeit
+
+from compiled_model import load_compiled_model
+from feature_schema import FeatureSchema
+from folded_model import load_folded_model
+from model_registry import registry
+from prediction_cache import PredictionCache
+
+# the Simulator form defaults
+DEFAULTS = {"female": 0, "age": 30, "inc_q": 3, "emp_in": 1.0, "account": 1.0, "borrowed": 1.0, "saved": 1.0,
+            "receive_wages": 1.0, "receive_transfers": 1.0, "receive_pension": 1.0, "pay_utilities": 1.0,
+            "anydigpayment": 1.0, "mobileowner": 1.0, "internetaccess": 1.0, "debit_card": 1.0,
+            "credit_card": 1.0, "paid_balance_regularly": 1.0}
+FLAGS = [name for name in DEFAULTS if name not in ("female", "age", "inc_q")]
+
+
+def submissions(schema, n: int, seed: int = 0):
+    """Mostly default forms from a few popular countries, with a
+    geometric number of fields changed"""
+
+    rng = np.random.default_rng(seed)
+    countries = schema.country_names
+    weights = 1.0 / np.arange(1, len(countries) + 1) ** 1.2
+    weights /= weights.sum()
+
+    X = np.empty((n, schema.n_features), dtype=np.float32)
+    for i in range(n):
+        values = dict(DEFAULTS)
+        for _ in range(rng.geometric(0.6) - 1):
+            field = rng.choice(["age", "inc_q", "female", "flag"])
+            if field == "age":
+                values["age"] = int(rng.integers(18, 80))
+            elif field == "inc_q":
+                values["inc_q"] = int(rng.integers(1, 6))
+            elif field == "female":
+                values["female"] = 1
+            else:
+                values[FLAGS[rng.integers(len(FLAGS))]] = 0.0
+        schema.encode_row(values, countries[rng.choice(len(countries), p=weights)], out=X[i])
+
+    return X
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkpoint", default=models_path / "best_ordinal_nn_model.pth")
+    parser.add_argument("--submissions", type=int, default=20_000)
+    args = parser.parse_args()
+
+    schema = FeatureSchema.load(models_path / "feature_schema.json")
+    X = submissions(schema, args.submissions)
+    print(f"{len(X):,} submissions, {len(np.unique(X, axis=0)):,} distinct")
+
+    for max_entries in (256, 1024, 4096, 16384):
+        cache = PredictionCache(max_entries)
+        for row in X:
+            cache.predict(row, args.checkpoint, load_folded_model)
+        stats = cache.stats()
+        print(f"  max_entries {max_entries:>6}: hit rate {stats['hit_rate']:.2%}, {stats['evictions']:,} evictions")
+
+    for name, path, loader in (("folded NumPy", args.checkpoint, load_folded_model),
+                               ("TorchScript", models_path / "best_ordinal_nn_model.ts", load_compiled_model)):
+        model = registry.get(path, loader)
+        cache.predict(X[:1], path, loader)
+        t_model = timeit(model.predict, X[:1], repeat=2000)
+        t_hit = timeit(cache.predict, X[:1], path, loader, repeat=2000)
+        print(f"single row, {name:<12}: forward pass {t_model['median_ms']:.4f} ms | "
+              f"cache hit {t_hit['median_ms']:.4f} ms")
@@ -0,0 +1,130 @@
+# -*- coding: UTF-8 -*-
+"""Drives /predict, /metrics and the error paths of the prediction
+service through InProcessClient, then times concurrent single-row
+requests against the micro-batcher. Exits 1 when a route misbehaves"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import numpy as np
+
+from common import models_path
+
+from prediction_cache import prediction_cache
+from prediction_service import InProcessClient, PredictionService
+
+# the Simulator form defaults
+FEATURES = {"female": 0, "age": 30, "inc_q": 3, "emp_in": 1.0, "account": 1.0, "borrowed": 1.0, "saved": 1.0,
+            "receive_wages": 1.0, "receive_transfers": 1.0, "receive_pension": 1.0, "pay_utilities": 1.0,
+            "anydigpayment": 1.0, "mobileowner": 1.0, "internetaccess": 1.0, "debit_card": 1.0,
+            "credit_card": 1.0, "paid_balance_regularly": 1.0}
+
+
+def broken_predict(X):
+    """A model failure that must surface as a 500, not a 400"""
+
+    raise ValueError("shapes (1,154) and (153,64) not aligned")
+
+
+async def check_routes(service: PredictionService, country: str):
+
+    failures = []
+
+    def expect(name, response, status, field=None):
+        got, payload = response
+        ok = got == status and (field is None or field in payload)
+        print(f"  {'ok  ' if ok else 'FAIL'} {name:<34} {got} {payload if not ok or got != 200 else ''}")
+        if not ok:
+            failures.append(name)
+        return payload
+
+    row = {"features": FEATURES, "country": country}
+
+    async with InProcessClient(service) as client:
+        one = expect("POST /predict", await client.post("/predict", row), 200, "probabilities")
+        many = expect("POST /predict rows", await client.post("/predict", {"rows": [row] * 3}), 200, "predictions")
+        if many.get("predictions", [None])[0] != one:
+            failures.append("batch and single predictions differ")
+
+        expect("missing feature", await client.post(
+            "/predict", {"features": {**FEATURES, "age": None}, "country": country}), 400, "error")
+        expect("unknown country", await client.post("/predict", {"features": FEATURES, "country": "Atlantis"}),
+               400, "error")
+        expect("empty rows", await client.post("/predict", {"rows": []}), 400, "error")
+        expect("rows beyond the queue", await client.post(
+            "/predict", {"rows": [row] * (service.max_rows + 1)}), 413, "error")
+        expect("not an object", await client.post("/predict", [row]), 400, "error")
+        expect("GET /predict", await client.get("/predict"), 405)
+        expect("GET /nowhere", await client.get("/nowhere"), 404)
+
+        metrics = expect("GET /metrics", await client.get("/metrics"), 200, "prediction_cache")
+        if metrics.get("requests") != 2:
+            failures.append(f"/metrics counted {metrics.get('requests')} requests, expected 2")
+
+    # a batch that does not fit the free space is turned away whole: none of its rows is scored
+    scored = []
+    service.batcher.predict = lambda X: scored.append(len(X)) or service.predict(X)
+    async with InProcessClient(service) as client:
+        waiting = [service.schema.encode_row(FEATURES, country) for _ in range(service.max_rows - 1)]
+        pending = asyncio.ensure_future(service.batcher.submit_many(waiting))
+        await asyncio.sleep(0)
+        expect("rows beyond the free space", await client.post("/predict", {"rows": [row] * 3}), 503, "error")
+        await pending
+    if sum(scored) != len(waiting):
+        failures.append(f"a rejected batch was scored: {sum(scored)} rows for {len(waiting)} admitted")
+
+    # a ValueError raised inside the model is a server error
+    service.predict = broken_predict
+    service.batcher.predict = broken_predict
+    async with InProcessClient(service) as client:
+        expect("model raises ValueError", await client.post(
+            "/predict", {"features": {**FEATURES, "age": 41}, "country": country}), 500, "error")
+
+    return failures
+
+
+async def throughput(service: PredictionService, country: str, n: int, seed: int):
+    """Requests per second for n concurrent single-row posts of distinct forms"""
+
+    rng = np.random.default_rng(seed)
+    rows = [{"features": {**FEATURES, "age": int(age), "inc_q": int(inc_q)}, "country": country}
+            for age, inc_q in zip(rng.integers(18, 80, n), rng.integers(1, 6, n))]
+
+    prediction_cache.clear()
+    async with InProcessClient(service) as client:
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(client.post("/predict", row) for row in rows))
+        seconds = time.perf_counter() - started
+
+        _, metrics = await client.get("/metrics")
+
+    assert all(status == 200 for status, _ in responses)
+
+    return n / seconds, metrics
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=models_path / "best_ordinal_nn_model.npz")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    service = PredictionService(args.model)
+    country = service.schema.country_names[1]
+
+    print("routes")
+    failures = asyncio.run(check_routes(service, country))
+
+    # a queue that holds every request, so none is turned away with a 503
+    service = PredictionService(args.model, max_queue=args.requests)
+    rate, metrics = asyncio.run(throughput(service, country, args.requests, args.seed))
+    print(f"throughput: {rate:,.0f} requests/s over {args.requests:,} concurrent posts, "
+          f"p50 {metrics['latency_ms']['p50']} ms, batches {metrics['batch_size_histogram']}")
+
+    if failures:
+        print(f"{len(failures)} failing: {failures}")
+        sys.exit(1)
@@ -0,0 +1,71 @@
+# -*- coding: UTF-8 -*-
+"""Int8 against float32 for the folded ordinal network: class agreement,
+probability drift, artifact size and batch throughput on the held-out
+split (the notebook's 20% test rows, or synthetic rows without the data)"""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from common import data_path, models_path, synthetic_features, timeit
+
+from folded_model import FoldedOrdinalNN
+from quantized_model import QuantizedOrdinalNN
+
+
+def held_out(path: Path, seed: int = 42):
+    """Unscaled test rows of the notebook's 80/20 split, as the Simulator feeds them"""
+
+    from sklearn.model_selection import train_test_split
+
+    df = pd.read_csv(path, encoding="latin1").drop(columns="worry_level")
+    _, X_test = train_test_split(df.to_numpy(dtype=np.float32), test_size=0.2, random_state=seed)
+
+    return X_test
+
+
+def artifact_size(model, suffix: str = ".npz"):
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / f"model{suffix}"
+        model.save(path)
+        return path.stat().st_size
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkpoint", type=Path, default=models_path / "best_ordinal_nn_model.pth")
+    parser.add_argument("--data", type=Path, default=data_path / "cleaned_data_dummies.csv")
+    parser.add_argument("--rows", type=int, default=20_000, help="synthetic rows when the data is missing")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    fp32 = FoldedOrdinalNN.from_checkpoint(args.checkpoint)
+    int8 = QuantizedOrdinalNN.from_checkpoint(args.checkpoint)
+
+    if args.data.exists():
+        X, source = held_out(args.data), "held-out split"
+    else:
+        X, source = synthetic_features(args.rows, seed=7), "synthetic rows"
+
+    preds_fp32, probs_fp32 = fp32.predict(X)
+    preds_int8, probs_int8 = int8.predict(X)
+    drift = np.abs(probs_int8 - probs_fp32)
+
+    print(f"{len(X):,} {source}")
+    print(f"  class agreement   {(preds_int8 == preds_fp32).mean():.4%}")
+    print(f"  probability drift mean {drift.mean():.2e}  p99 {np.percentile(drift, 99):.2e}  max {drift.max():.2e}")
+    print(f"  size              .pth {args.checkpoint.stat().st_size / 1024:.1f} KiB | "
+          f"fp32 .npz {artifact_size(fp32) / 1024:.1f} KiB | int8 .npz {artifact_size(int8) / 1024:.1f} KiB")
+
+    for n_rows in (1, 64, 4096):
+        batch = X[:n_rows]
+        repeat = args.repeat * 25 if n_rows < 4096 else args.repeat
+        t_fp32 = timeit(fp32.predict, batch, repeat=repeat)["median_ms"]
+        t_int8 = timeit(int8.predict, batch, repeat=repeat)["median_ms"]
+        print(f"  batch {n_rows:>5}: fp32 {n_rows / t_fp32 * 1e3:>12,.0f} rows/s | "
+              f"int8 {n_rows / t_int8 * 1e3:>12,.0f} rows/s")
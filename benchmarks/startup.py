@@ -0,0 +1,123 @@
+# -*- coding: UTF-8 -*-
+"""Cold-start benchmark: import time, first render and resident memory
+of each app page, every one measured in a fresh interpreter. Pages are
+rendered under streamlit's bare mode (plain python, no server), where
+widgets return their defaults, so the first __call__ does the same
+loading a first visit does"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from common import app_path
+
+# page -> (script, page class rendered after import); app.py renders itself on import
+PAGES = {
+    "python": (None, None),
+    "app": (app_path / "app.py", None),
+    "dashboard": (app_path / "app_pages" / "dashboard.py", "Dashboard"),
+    "simulator": (app_path / "app_pages" / "simulations.py", "Simulator"),
+    "about": (app_path / "app_pages" / "info.py", "About"),
+}
+
+HEAVY_MODULES = ["torch", "geopandas", "folium", "plotly", "pandas", "streamlit_echarts"]
+
+# runs in the child; page main guards do not fire under run_name="__bench__",
+# the page class is built and called explicitly so import and render are timed apart
+CHILD = r"""
+import json, os, resource, runpy, sys, time, warnings
+warnings.simplefilter("ignore")
+path, page, app_dir, heavy = sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4].split(",")
+sys.path.insert(0, app_dir)
+
+def rss_mb():
+    with open("/proc/self/statm") as file:
+        return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+started = time.perf_counter()
+imported = rendered = None
+error = None
+try:
+    if path != "-":
+        namespace = runpy.run_path(path, run_name="__bench__")
+    imported = time.perf_counter()
+    import_rss = rss_mb()
+    if page != "-":
+        namespace[page]()()
+    rendered = time.perf_counter()
+except Exception as exc:
+    error = repr(exc)
+print(json.dumps({
+    "import_seconds": (imported or time.perf_counter()) - started,
+    "render_seconds": rendered - imported if rendered and imported else None,
+    "import_rss_mb": import_rss if imported else None,
+    "rss_mb": rss_mb(),
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy_loaded": [name for name in heavy if name in sys.modules],
+    "error": error,
+}))
+"""
+
+
+def median(results, field: str, digits: int):
+
+    values = [r[field] for r in results if r[field] is not None]
+
+    return round(statistics.median(values), digits) if values else None
+
+
+def measure(path, page: str = None, runs: int = 3):
+
+    results = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", CHILD, str(path) if path else "-", page or "-", str(app_path),
+             ",".join(HEAVY_MODULES)],
+            capture_output=True, text=True, cwd=app_path, check=True,
+        )
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    return {
+        "import_seconds": median(results, "import_seconds", 4),
+        "render_seconds": median(results, "render_seconds", 4),
+        "import_rss_mb": median(results, "import_rss_mb", 1),
+        "rss_mb": median(results, "rss_mb", 1),
+        "peak_rss_mb": median(results, "peak_rss_mb", 1),
+        "heavy_loaded": results[-1]["heavy_loaded"],
+        "error": results[-1]["error"],
+    }
+
+
+def total_seconds(row):
+
+    return row["import_seconds"] + (row["render_seconds"] or 0.0)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=None,
+                        help="fail when any page takes longer than this many seconds to import and render")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    report = {name: measure(path, page, args.runs) for name, (path, page) in PAGES.items()}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'page':<10} {'import':>9} {'render':>9} {'RSS import':>11} {'RSS render':>11} {'peak':>9}  heavy modules")
+        for name, row in report.items():
+            render = f"{row['render_seconds']:>7.3f} s" if row["render_seconds"] is not None else f"{'-':>9}"
+            import_rss = f"{row['import_rss_mb']:>8.1f} MB" if row["import_rss_mb"] is not None else f"{'-':>11}"
+            print(f"{name:<10} {row['import_seconds']:>7.3f} s {render} {import_rss} {row['rss_mb']:>8.1f} MB "
+                  f"{row['peak_rss_mb']:>6.1f} MB  {', '.join(row['heavy_loaded']) or '-'}"
+                  f"{'  (' + row['error'] + ')' if row['error'] else ''}")
+
+    over = [name for name, row in report.items() if args.budget and total_seconds(row) > args.budget]
+    if over:
+        print(f"over the {args.budget}s cold-start budget: {', '.join(over)}")
+        sys.exit(1)
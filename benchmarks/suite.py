@@ -0,0 +1,267 @@
+# -*- coding: UTF-8 -*-
+"""Headless benchmark suite for the dashboard, chart and inference hot
+paths. Streamlit is replaced by a memoizing stand-in for st.cache_* so the
+pages run without a server; every cached method is timed through its
+undecorated body, with its own dependencies already warm. Data is a
+scaled copy of cleaned_data.csv (synthetic when absent) with fixed seeds.
+
+    python suite.py --save-baseline          # record benchmarks/baseline.json
+    python suite.py                          # compare, exit 1 on regressions
+"""
+
+import argparse
+import functools
+import json
+import os
+import platform
+import sys
+import tempfile
+import types
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from common import cleaned_data, data_path, root_path, synthetic_features, timeit
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+
+def _cache(func=None, **_):
+    """st.cache_data / st.cache_resource: memoized per argument identity"""
+
+    def decorator(func):
+
+        memo = {}
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = tuple(a if isinstance(a, (str, int, float, tuple, type(None))) else id(a) for a in args)
+            key += tuple(sorted(kwargs.items()))
+            if key not in memo:
+                memo[key] = func(*args, **kwargs)
+            return memo[key]
+
+        return wrapper
+
+    return decorator(func) if callable(func) else decorator
+
+
+def headless_streamlit():
+    """Installs the stand-in modules before any page is imported"""
+
+    st = types.ModuleType("streamlit")
+    st.cache_data = st.cache_resource = _cache
+    echarts = types.ModuleType("streamlit_echarts")
+    echarts.st_echarts = lambda *args, **kwargs: None
+
+    sys.modules["streamlit"] = st
+    sys.modules["streamlit_echarts"] = echarts
+
+
+def case(results, name, func, *args, repeat: int = 20, warmup: int = 2):
+
+    results[name] = timeit(func, *args, repeat=repeat, warmup=warmup)
+    print(f"  {name:<44} {results[name]['median_ms']:>10.3f} ms  (p99 {results[name]['p99_ms']:.3f})", flush=True)
+
+
+def transform_data(df, by: str):
+    """The groupby-median the dashboard ran before WorryCube, timed as a reference"""
+
+    return df.groupby(by, observed=True)["financial_worry"].median().reset_index()
+
+
+def filter_chain(dash, df, country: str = "All", sex: str = "Female", ages: str = "20-40"):
+    """The non-rendering work of Dashboard.info_dashboard for one filter set"""
+
+    from bitmap_index import gather
+    from choropleth import map_payload
+
+    countries = df["economy"].unique().tolist()
+    country_filter = countries if country == "All" else [country]
+    sex_filter = [0, 1] if sex == "All" else [{"Male": 0, "Female": 1}[sex]]
+
+    version = dash.data_version()
+    index = dash.bitmap_index(version)
+    age_labels = index.values("ages_cut")
+    ages_filter = age_labels if ages == "All" else [ages]
+    rows = index.select(ages_cut=ages_filter, female=sex_filter,
+                        economy=None if country == "All" else country_filter)
+
+    cube = dash.worry_cube(version)
+    age_mask = dash.add_age_cuts(pd.DataFrame({"age": cube.ages})).isin(ages_filter).to_numpy()
+    economies = None if country == "All" else country_filter
+
+    values = cube.median_by_country(economies, {"female": sex_filter}, age_mask)
+    payload = map_payload(values, dash.map_names())
+    df_agg = gather(df, rows, ["inc_q", "financial_worry"]).dropna()
+    by_age = cube.median_by_age(economies, {"female": sex_filter, "emp_in": [1], "saved": [1]}, age_mask)
+
+    scores = dash.stress_scores()
+    economy = df["economy"].cat
+    counts = scores.class_counts(economy.codes.to_numpy(), len(economy.categories), rows)
+
+    return payload, df_agg, by_age, counts
+
+
+def run(scale: int, seed: int, repeat: int, workdir: Path):
+
+    headless_streamlit()
+    sys.path.insert(0, str(root_path / "app" / "app_pages"))
+
+    from dashboard import Dashboard
+    from simulations import Simulator
+    from graphs import Graphs
+    from prediction_cache import prediction_cache
+    from whatif import sensitivity_sweep
+
+    # a scaled copy of the data in a scratch data directory
+    df_source = cleaned_data(scale, seed)
+    df_source.to_csv(workdir / "cleaned_data.csv", index=False)
+
+    dash = Dashboard()
+    dash.data_path = workdir
+
+    results = {}
+    print(f"{len(df_source):,} rows (scale {scale}, seed {seed})")
+
+    print("dashboard")
+    case(results, "data_version", dash.data_version, repeat=repeat)
+    version = dash.data_version()
+    case(results, "read_data", Dashboard.read_data.__wrapped__, dash, version, None, repeat=repeat)
+    df = dash.read_data(version)
+    case(results, "transform_data (legacy groupby)", transform_data, df, "economy", repeat=repeat)
+    case(results, "corr_stats (build)", Dashboard.corr_stats.__wrapped__, dash, version,
+         repeat=max(repeat // 4, 3))
+    dash.corr_stats(version)
+    case(results, "make_corr_matrix (all)", dash.make_corr_matrix, version, repeat=repeat)
+    few = dash.corr_stats(version).groups[:5]
+    case(results, "make_corr_matrix (5 countries)", dash.make_corr_matrix, version, few, repeat=repeat)
+    case(results, "add_age_cuts", dash.add_age_cuts, df, repeat=repeat)
+
+    print("filter chain")
+    case(results, "bitmap_index (build)", Dashboard.bitmap_index.__wrapped__, dash, version,
+         repeat=max(repeat // 4, 3))
+    case(results, "worry_cube (build)", Dashboard.worry_cube.__wrapped__, dash, version,
+         repeat=max(repeat // 4, 3))
+    case(results, "stress_scores (open)", dash.stress_scores, repeat=repeat)
+    country = df["economy"].cat.categories[0]
+    case(results, "info_dashboard filters (all countries)", filter_chain, dash, df, repeat=repeat)
+    case(results, "info_dashboard filters (one country)", filter_chain, dash, df, country, repeat=repeat)
+
+    print("graphs")
+    graphs = Graphs()
+    payload, df_agg, by_age, counts = filter_chain(dash, df)
+    corr = dash.make_corr_matrix(version)
+    df_counts = df[["financial_worry"]].set_axis(["values"], axis=1)
+    df_flags = df[["account"]].set_axis(["values"], axis=1)
+    df_box = df[["inc_q", "financial_worry"]].dropna()
+    params = pd.read_csv(data_path / "logistic_regression_bayes_coef.csv")
+
+    simulator = Simulator()
+    x = synthetic_features(1, seed)[0]
+    sweep = sensitivity_sweep(simulator.ordinal_model, x)
+
+    # called without key=..., so the chart cache is bypassed and the build itself is timed
+    builders = {
+        "echart_dict": (graphs.echart_dict, by_age),
+        "correlation_heatmap": (graphs.correlation_heatmap, corr),
+        "histogram": (graphs.histogram, df_counts, "Financial Worry Index"),
+        "pie_plot": (graphs.pie_plot, df_flags, "Account Holder"),
+        "boxplot": (graphs.boxplot, df_box, "inc_q", "Income Quantil"),
+        "scatter_plot": (graphs.scatter_plot, df_agg),
+        "h_bar_plot": (graphs.h_bar_plot, params),
+        "sensitivity_bar": (graphs.sensitivity_bar, sweep),
+        "sensitivity_line": (graphs.sensitivity_line, sweep["age"], "Along Age", "Age", 30),
+        "predicted_stress_bar": (graphs.predicted_stress_bar, df["economy"].cat.categories.tolist(),
+                                 counts, ["Low Stress", "Medium Stress"]),
+    }
+    for name, (builder, *args) in builders.items():
+        case(results, f"Graphs.{name}", builder, *args, repeat=repeat)
+    # a hit returns the stored options without rebuilding or decoding them
+    case(results, "Graphs.boxplot (chart cache hit)", functools.partial(graphs.boxplot, key=(version, "suite")),
+         df_box, "inc_q", "Income Quantil", repeat=repeat)
+    # bar_chart_dict is not called by any page and reads attributes Graphs does not
+    # have (config, min_value), so it cannot be timed
+    print("  Graphs.bar_chart_dict                        skipped (unused, not runnable)")
+
+    print("simulator")
+    X = synthetic_features(4096, seed)
+    for batch in (1, 64, 4096):
+        rows = X[:batch]
+        inner = repeat * 10 if batch < 4096 else repeat
+
+        def miss(rows=rows):
+            prediction_cache.clear()
+            return simulator.predict_class(rows)
+
+        case(results, f"predict_class[{batch}] (forward pass)", miss, repeat=inner)
+        case(results, f"predict_class[{batch}] (cached)", simulator.predict_class, rows, repeat=inner)
+
+    meta = {
+        "scale": scale,
+        "seed": seed,
+        "rows": len(df_source),
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+    return {"meta": meta, "results": results}
+
+
+def compare(report: dict, baseline: dict, tolerance: float, min_ms: float):
+    """Cases whose median grew by more than tolerance (and min_ms) over the baseline"""
+
+    regressions = {}
+    for name, row in report["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        delta = row["median_ms"] - base["median_ms"]
+        if delta > min_ms and row["median_ms"] > base["median_ms"] * (1 + tolerance):
+            regressions[name] = {"baseline_ms": base["median_ms"], "median_ms": row["median_ms"],
+                                 "ratio": round(row["median_ms"] / base["median_ms"], 2)}
+
+    return regressions
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=1, help="copies of the data")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("-o", "--output", type=Path, default=None, help="write the results JSON here")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, as a fraction")
+    parser.add_argument("--min-ms", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        report = run(args.scale, args.seed, args.repeat, Path(workdir))
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=1), encoding="utf-8")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=1), encoding="utf-8")
+        print(f"baseline saved to {args.baseline}")
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if {key: baseline["meta"].get(key) for key in ("scale", "seed")} != \
+                {key: report["meta"][key] for key in ("scale", "seed")}:
+            print(f"warning: baseline was recorded with scale {baseline['meta'].get('scale')}, "
+                  f"seed {baseline['meta'].get('seed')}")
+        regressions = compare(report, baseline, args.tolerance, args.min_ms)
+        for name, row in regressions.items():
+            print(f"REGRESSION {name}: {row['baseline_ms']} -> {row['median_ms']} ms (x{row['ratio']})")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    else:
+        print(f"no baseline at {args.baseline}; run with --save-baseline to record one")
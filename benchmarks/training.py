@@ -0,0 +1,49 @@
+# -*- coding: UTF-8 -*-
+"""One training epoch of PowerfulOrdinalNN: the notebook's per-row
+DataLoader against pre-collated in-memory batches, fp32 and bf16 autocast"""
+
+import argparse
+import time
+
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, TensorDataset
+
+from common import synthetic_features
+
+from ordinal_model import PowerfulOrdinalNN
+from train import InMemoryBatches, Trainer, set_threads
+
+
+def epoch_seconds(trainer, batches):
+
+    started = time.perf_counter()
+    trainer.run_epoch(batches)
+
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=89_000)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    threads = set_threads(args.threads)
+    torch.manual_seed(0)
+    X = torch.from_numpy(synthetic_features(args.rows, seed=0))
+    y = (torch.rand(args.rows, 2) > 0.5).float()
+
+    cases = {
+        "DataLoader, fp32": (False, DataLoader(TensorDataset(X, y), batch_size=128, shuffle=True)),
+        "in-memory, fp32": (False, InMemoryBatches(X, y, 128, shuffle=True)),
+        "in-memory, bf16": (True, InMemoryBatches(X, y, 128, shuffle=True)),
+    }
+    print(f"{args.rows:,} rows, batch 128, {threads} threads")
+
+    for name, (bf16, batches) in cases.items():
+        trainer = Trainer(PowerfulOrdinalNN(), nn.BCEWithLogitsLoss(), bf16=bf16, log=None)
+        epoch_seconds(trainer, batches)
+        seconds = min(epoch_seconds(trainer, batches) for _ in range(2))
+        print(f"  {name:<18} {seconds:6.2f} s/epoch  {args.rows / seconds:10,.0f} samples/s")
@@ -0,0 +1,13 @@
+# -*- coding: UTF-8 -*-
+"""Shared fixtures for the test suite"""
+
+import sys
+from pathlib import Path
+
+root_path = Path(__file__).resolve().parent.parent
+app_path = root_path / "app"
+models_path = root_path / "models"
+
+# the app modules import each other by bare name (streamlit runs from app/)
+if str(app_path) not in sys.path:
+    sys.path.insert(0, str(app_path))
@@ -0,0 +1,62 @@
+# -*- coding: UTF-8 -*-
+"""ChartCache hits, keys and size accounting"""
+
+import json
+
+import numpy as np
+
+import chart_cache as chart_cache_module
+from chart_cache import ChartCache, cached_chart
+
+
+class Charts:
+
+    def __init__(self):
+
+        self.builds = 0
+
+    @cached_chart("bars")
+    def bars(self, values):
+
+        self.builds += 1
+        return {"series": [{"data": np.asarray(values)}]}
+
+
+def test_hit_returns_stored_options_without_decoding(monkeypatch):
+
+    monkeypatch.setattr(chart_cache_module, "chart_cache", ChartCache())
+    charts = Charts()
+
+    first = charts.bars([1, 2, 3], key=("v1",))
+    monkeypatch.setattr(json, "loads", lambda *_: (_ for _ in ()).throw(AssertionError("decoded on a hit")))
+    second = charts.bars([1, 2, 3], key=("v1",))
+
+    assert second is first
+    assert first == {"series": [{"data": [1, 2, 3]}]}
+    assert charts.builds == 1
+    assert chart_cache_module.chart_cache.stats()["hits"] == 1
+
+
+def test_new_data_version_rebuilds(monkeypatch):
+
+    monkeypatch.setattr(chart_cache_module, "chart_cache", ChartCache())
+    charts = Charts()
+
+    charts.bars([1], key=("v1", "Age"))
+    rebuilt = charts.bars([2], key=("v2", "Age"))
+
+    assert rebuilt["series"][0]["data"] == [2]
+    assert charts.builds == 2
+
+
+def test_evicts_by_serialized_size():
+
+    cache = ChartCache(max_bytes=100)
+    for i in range(5):
+        cache.get_or_build(("chart", i), lambda: {"data": "x" * 30})
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 100
+    assert stats["evictions"] == 5 - stats["entries"]
+    assert cache.get(("chart", 4)) is not None
+    assert cache.get(("chart", 0)) is None
@@ -0,0 +1,40 @@
+# -*- coding: UTF-8 -*-
+"""The choropleth page runs from committed static files only"""
+
+import math
+import re
+from urllib.parse import unquote
+
+from conftest import app_path
+from choropleth import GEOMETRY, country_names, map_payload
+
+PAGE = app_path / "static" / "choropleth.html"
+
+
+def test_geometry_is_committed_and_readable_without_geopandas():
+
+    names = country_names()
+
+    assert GEOMETRY.exists()
+    assert len(names) == len(set(names)) > 150
+    assert {"Brazil", "Chile", "Peru"} <= set(names)
+
+
+def test_page_loads_only_local_scripts():
+
+    sources = re.findall(r'<script src="([^"]+)"', PAGE.read_text(encoding="utf-8"))
+
+    assert sources
+    for source in sources:
+        assert "://" not in source
+        assert (PAGE.parent / source).is_file()
+
+
+def test_payload_follows_the_geometry_order():
+
+    names = country_names()
+    payload = map_payload({names[1]: 0.12345, names[0]: math.nan}, names)
+
+    values = unquote(payload).strip("[]").split(",")
+    assert len(values) == len(names)
+    assert values[:3] == ["null", "0.123", "null"]
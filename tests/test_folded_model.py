@@ -0,0 +1,195 @@
+# -*- coding: UTF-8 -*-
+"""FoldedOrdinalNN against PowerfulOrdinalNN in eval mode"""
+
+import warnings
+
+import numpy as np
+import pytest
+import torch
+
+from conftest import models_path
+from folded_model import FoldedOrdinalNN, decode_ordinal, fold_state_dict, load_folded_model
+from ordinal_model import PowerfulOrdinalNN
+
+CHECKPOINT = models_path / "best_ordinal_nn_model.pth"
+ARTIFACT = models_path / "best_ordinal_nn_model.npz"
+
+
+def random_network(seed: int, out_features: int = 2):
+    """An eval-mode network whose BatchNorm statistics are far from identity"""
+
+    torch.manual_seed(seed)
+    model = PowerfulOrdinalNN(out_features=out_features)
+    with torch.no_grad():
+        for bn in (model.bn1, model.bn2):
+            bn.running_mean.uniform_(-2.0, 2.0)
+            bn.running_var.uniform_(0.05, 4.0)
+            bn.weight.uniform_(0.5, 1.5)
+            bn.bias.uniform_(-0.5, 0.5)
+
+    return model.eval()
+
+
+def fold(model):
+
+    state = {key: value.detach().numpy().astype(np.float64) for key, value in model.state_dict().items()}
+
+    return FoldedOrdinalNN(fold_state_dict(state))
+
+
+def survey_rows(n: int, seed: int = 0):
+    """0/1 flags, age 15-99, income quantile 1-5 and one country dummy"""
+
+    rng = np.random.default_rng(seed)
+    X = np.zeros((n, 154), dtype=np.float32)
+    X[:, :17] = rng.integers(0, 2, (n, 17))
+    X[:, 1] = rng.integers(15, 100, n)
+    X[:, 2] = rng.integers(1, 6, n)
+    X[np.arange(n), rng.integers(17, 154, n)] = 1.0
+
+    return X
+
+
+def edge_batches():
+
+    return {
+        "one row": survey_rows(1),
+        "zeros": np.zeros((4, 154), dtype=np.float32),
+        "ones": np.ones((4, 154), dtype=np.float32),
+        "extreme age": np.where(np.arange(154) == 1, 1e4, 0.0).astype(np.float32)[None, :],
+        "negative": -survey_rows(8, seed=3),
+        "gaussian": np.random.default_rng(1).normal(0, 3, (64, 154)).astype(np.float32),
+    }
+
+
+def torch_logits(model, X):
+
+    with torch.inference_mode():
+        return model(torch.from_numpy(X)).numpy()
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_random_networks_match(seed):
+
+    model = random_network(seed)
+    folded = fold(model)
+    X = survey_rows(2048, seed)
+
+    np.testing.assert_allclose(folded(X), torch_logits(model, X), rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize("name", list(edge_batches()))
+def test_edge_batches_match(name):
+
+    model = random_network(7)
+    folded = fold(model)
+    X = edge_batches()[name]
+    expected = torch_logits(model, X)
+
+    np.testing.assert_allclose(folded(X), expected, rtol=1e-4, atol=1e-4 * max(1.0, np.abs(expected).max()))
+
+
+def test_single_vector_is_one_row():
+
+    folded = fold(random_network(0))
+    x = survey_rows(1)
+
+    assert folded(x[0]).shape == (1, 2)
+    np.testing.assert_array_equal(folded(x[0]), folded(x))
+
+
+def test_empty_batch():
+
+    folded = fold(random_network(0))
+
+    assert folded(np.zeros((0, 154), dtype=np.float32)).shape == (0, 2)
+
+
+def test_multiclass_head_matches():
+
+    model = random_network(4, out_features=3)
+    X = survey_rows(256, 4)
+
+    np.testing.assert_allclose(fold(model)(X), torch_logits(model, X), rtol=1e-4, atol=1e-4)
+
+
+def test_shipped_checkpoint_matches():
+
+    model = PowerfulOrdinalNN()
+    model.load_state_dict(torch.load(CHECKPOINT, map_location="cpu"))
+    model.eval()
+    X = survey_rows(4096, 5)
+
+    np.testing.assert_allclose(FoldedOrdinalNN.from_checkpoint(CHECKPOINT)(X), torch_logits(model, X),
+                               rtol=1e-4, atol=1e-4)
+
+
+def test_shipped_artifact_is_current():
+
+    X = survey_rows(1024, 6)
+    with warnings.catch_warnings():
+        # a stale-artifact warning fails the test
+        warnings.simplefilter("error", UserWarning)
+        artifact = load_folded_model(ARTIFACT)
+
+    np.testing.assert_allclose(artifact(X), FoldedOrdinalNN.from_checkpoint(CHECKPOINT)(X), rtol=1e-6, atol=1e-6)
+
+
+def test_stale_artifact_warns(tmp_path):
+
+    checkpoint = tmp_path / "model.pth"
+    torch.save(random_network(0).state_dict(), checkpoint)
+    FoldedOrdinalNN.from_checkpoint(checkpoint).save(tmp_path / "model.npz", source=checkpoint)
+
+    torch.save(random_network(1).state_dict(), checkpoint)
+    with pytest.warns(UserWarning, match="folded from an older model.pth"):
+        FoldedOrdinalNN.load(tmp_path / "model.npz")
+
+
+def test_ordinal_output_decodes_to_three_levels():
+
+    folded = fold(random_network(0))
+    levels, probs = folded.predict(survey_rows(2048, 8))
+
+    assert folded.n_classes == 3
+    assert probs.shape == (2048, 3)
+    assert (probs >= 0).all()
+    np.testing.assert_allclose(probs.sum(axis=1), 1.0, atol=1e-6)
+    np.testing.assert_array_equal(folded.predict_proba(survey_rows(2048, 8)), probs)
+
+
+def test_decoded_levels_reach_high_stress():
+
+    # P(y > 0), P(y > 1) past, between and below 0.5
+    logits = np.array([[4.0, 3.0], [4.0, -3.0], [-4.0, -5.0]], dtype=np.float32)
+    levels, probs = decode_ordinal(logits)
+
+    assert levels.tolist() == [2, 1, 0]
+    assert probs.argmax(axis=1).tolist() == [2, 1, 0]
+    sigmoid = 1.0 / (1.0 + np.exp(-logits.astype(np.float64)))
+    np.testing.assert_allclose(probs[:, 2], sigmoid[:, 1], atol=1e-6)
+    np.testing.assert_allclose(probs[:, 0], 1.0 - sigmoid[:, 0], atol=1e-6)
+
+
+def test_crossing_thresholds_are_made_monotone():
+
+    # P(y > 1) above P(y > 0) would make P(Medium) negative
+    levels, probs = decode_ordinal(np.array([[-1.0, 2.0]], dtype=np.float32))
+
+    assert levels.tolist() == [0]
+    assert probs[0, 1] == 0.0
+    np.testing.assert_allclose(probs.sum(), 1.0, atol=1e-6)
+
+
+def test_levels_match_training_accuracy_on_the_shipped_checkpoint():
+
+    model = PowerfulOrdinalNN()
+    model.load_state_dict(torch.load(CHECKPOINT, map_location="cpu"))
+    model.eval()
+    X = survey_rows(4096, 9)
+    with torch.inference_mode():
+        expected = (torch.sigmoid(model(torch.from_numpy(X))) > 0.5).sum(dim=1).numpy()
+
+    levels, _ = load_folded_model(ARTIFACT).predict(X)
+
+    assert (levels == expected).mean() > 0.999
@@ -0,0 +1,93 @@
+# -*- coding: UTF-8 -*-
+"""PredictionCache against checkpoints that change on disk"""
+
+import os
+
+import numpy as np
+
+from model_registry import ModelRegistry
+import prediction_cache as prediction_cache_module
+from prediction_cache import PredictionCache
+
+
+class ConstantModel:
+    """Predicts the class written in its checkpoint for every row"""
+
+    def __init__(self, class_id: int):
+
+        self.class_id = class_id
+        self.calls = 0
+
+    def predict(self, X):
+
+        self.calls += 1
+        probs = np.zeros((len(X), 3), dtype=np.float32)
+        probs[:, self.class_id] = 1.0
+
+        return np.full(len(X), self.class_id), probs
+
+
+def load_constant(path):
+
+    return ConstantModel(int(path.read_text()))
+
+
+def write_checkpoint(path, class_id: int, padding: str = ""):
+
+    path.write_text(f"{class_id}{padding}")
+    # a new mtime even on filesystems with coarse timestamps
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_swapped_checkpoint_misses(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(prediction_cache_module, "registry", ModelRegistry())
+    checkpoint = tmp_path / "model.ckpt"
+    write_checkpoint(checkpoint, 0)
+
+    cache = PredictionCache()
+    x = np.ones((1, 4), dtype=np.float32)
+
+    preds, _ = cache.predict(x, checkpoint, load_constant)
+    assert preds.tolist() == [0]
+    cache.predict(x, checkpoint, load_constant)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    write_checkpoint(checkpoint, 2, padding="\n")
+    preds, probs = cache.predict(x, checkpoint, load_constant)
+
+    assert preds.tolist() == [2]
+    assert probs[0, 2] == 1.0
+    assert (cache.hits, cache.misses, cache.invalidations) == (1, 2, 1)
+
+
+def test_entries_carry_the_hash_of_the_model_that_made_them(tmp_path, monkeypatch):
+
+    registry = ModelRegistry()
+    monkeypatch.setattr(prediction_cache_module, "registry", registry)
+    checkpoint = tmp_path / "model.ckpt"
+    write_checkpoint(checkpoint, 1)
+
+    cache = PredictionCache()
+    cache.predict(np.zeros((2, 4), dtype=np.float32), checkpoint, load_constant)
+
+    model, sha256 = registry.get_versioned(checkpoint, load_constant)
+    assert set(cache._versions.values()) == {sha256}
+    assert model.class_id == 1
+
+
+def test_same_bytes_rewritten_keeps_entries(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(prediction_cache_module, "registry", ModelRegistry())
+    checkpoint = tmp_path / "model.ckpt"
+    write_checkpoint(checkpoint, 1)
+
+    cache = PredictionCache()
+    x = np.ones((1, 4), dtype=np.float32)
+    cache.predict(x, checkpoint, load_constant)
+
+    write_checkpoint(checkpoint, 1)
+    cache.predict(x, checkpoint, load_constant)
+
+    assert (cache.hits, cache.misses, cache.invalidations) == (1, 1, 0)
@@ -0,0 +1,84 @@
+# -*- coding: UTF-8 -*-
+"""WorryCube medians against the pandas filters they replaced"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from worry_cube import CUBE_FLAGS, WorryCube
+
+
+def survey(n: int = 5000, seed: int = 0, missing: float = 0.05):
+
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "economy": rng.choice(["Brazil", "Chile", "Peru", "Togo"], n),
+        "age": rng.integers(15, 90, n).astype(float),
+        "financial_worry": rng.integers(1, 5, n).astype(float),
+    })
+    for flag in CUBE_FLAGS:
+        column = rng.integers(0, 2, n).astype(float)
+        column[rng.random(n) < missing] = np.nan
+        df[flag] = column
+    df.loc[rng.random(n) < missing, "financial_worry"] = np.nan
+
+    return df
+
+
+def pandas_filter(df, countries, flags):
+    """The dashboard's old row filter: an equality test per filtered flag"""
+
+    mask = df["financial_worry"].notna()
+    if countries is not None:
+        mask &= df["economy"].isin(countries)
+    for flag, values in flags.items():
+        mask &= df[flag].isin(values)
+
+    return df[mask]
+
+
+CASES = [
+    (None, {}),
+    (None, {"female": [1]}),
+    (["Chile"], {"female": [0, 1]}),
+    (["Brazil", "Togo"], {"female": [0], "emp_in": [1], "saved": [1], "account": [1],
+                          "credit_card": [0], "mobileowner": [1]}),
+]
+
+
+@pytest.mark.parametrize("countries, flags", CASES)
+def test_median_by_age_matches_pandas(countries, flags):
+
+    df = survey()
+    expected = pandas_filter(df, countries, flags).groupby("age")["financial_worry"].median()
+
+    result = WorryCube(df).median_by_age(countries, flags)
+
+    np.testing.assert_array_equal(result["age"], expected.index)
+    np.testing.assert_allclose(result["financial_worry"], expected.to_numpy())
+
+
+@pytest.mark.parametrize("countries, flags", CASES)
+def test_median_by_country_matches_pandas(countries, flags):
+
+    df = survey(seed=1)
+    expected = pandas_filter(df, countries, flags).groupby("economy")["financial_worry"].median().to_dict()
+
+    assert WorryCube(df).median_by_country(countries, flags) == pytest.approx(expected)
+
+
+def test_rows_with_missing_flags_only_leave_filtered_cells():
+
+    df = survey(seed=2, missing=0.3)
+    cube = WorryCube(df)
+    valid = df["financial_worry"].notna()
+
+    assert cube.histogram().sum() == valid.sum()
+    assert cube.histogram(flags={"saved": [0, 1]}).sum() == (valid & df["saved"].notna()).sum()
+
+
+def test_clean_flags_enumerate_two_states():
+
+    df = survey(missing=0.0)
+
+    assert WorryCube(df).states == [(0, 1)] * len(CUBE_FLAGS)